@@ -3,6 +3,7 @@ from .profile import profile_bp
 from .posts import posts_bp
 from .feed import feed_bp
 from .jobs import jobs_bp
+from .media import media_bp
 from .messaging import messaging_bp
 
 __all__ = [
@@ -11,5 +12,6 @@ __all__ = [
     'posts_bp',
     'feed_bp',
     'jobs_bp',
+    'media_bp',
     'messaging_bp'
 ] 
\ No newline at end of file
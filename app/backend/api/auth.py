@@ -1,16 +1,15 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
 from models.user import User
+from services.passwords import password_hasher
 from flask_jwt_extended import create_access_token
 import re
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import cross_origin
 
 from flask import current_app as app
-import sys
 
 # Remove per-file Limiter and cross_origin
 # Blueprint
@@ -36,11 +35,7 @@ def signup():
     if not PASSWORD_REGEX.match(password):
         return jsonify({'msg': 'Password must be at least 8 characters, include a letter and a number'}), 400
 
-    # Check uniqueness
-    if User.query.filter((User.email == email) | (User.username == username)).first():
-        return jsonify({'msg': 'Email or username already exists'}), 400
-
-    # Create user
+    # Create user; the unique email_normalized and username indexes reject duplicates
     user = User(email=email, username=username, password=password)
     db.session.add(user)
     try:
@@ -57,12 +52,15 @@ def login():
     email = sanitize_input(data.get('email', ''))
     password = data.get('password', '')
 
-    # Find user by email only (case-insensitive)
-    user = User.query.filter(func.lower(User.email) == email.lower()).first()
-    # Debug print for password check
-    print(f"User: {user}, Password OK: {user.check_password(password) if user else 'N/A'}", file=sys.stderr)
-    if not user or not user.check_password(password):
+    # Find user by email only (case-insensitive, through the email_normalized index)
+    user = User.query.filter_by(email_normalized=User.normalize_email(email)).first()
+    # One hash per attempt; unknown emails pay the same cost, so timing doesn't reveal accounts
+    if not password_hasher.verify(user.password_hash if user else None, password):
         return jsonify({'msg': 'Invalid credentials'}), 401
+    if password_hasher.needs_rehash(user.password_hash):
+        # Hashed with older parameters: upgrade now that we have the plaintext
+        user.set_password(password)
+        db.session.commit()
 
     access_token = create_access_token(identity=user.email)
     return jsonify({'token': access_token, 'user': user.to_dict()}), 200
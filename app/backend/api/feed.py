@@ -1,24 +1,102 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from extensions import db
 from models.post import Post
 from models.user import User
+from models.follow import Follow
+from services import timelines
+from services.post_serializer import posts_response, render_posts
+from services.pagination import cursor_page_response
 
 feed_bp = Blueprint('feed', __name__)
 
+FEED_DEFAULT_LIMIT = 20
+FEED_MAX_LIMIT = 100          # Server-side cap for a JSON feed page
+FEED_STREAM_MAX_LIMIT = 1000  # Cap for the streamed NDJSON feed
+FEED_STREAM_BATCH = 100       # Rows fetched per round trip while streaming
+
 # NOTE: Define routes as '/something', not '/api/something'. The blueprint is registered with '/api/feed'. 
 
+def wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson'
+
+def stream_feed(query, limit):
+    """Yield one JSON post per line from a server-side cursor."""
+    rows = query.limit(limit).yield_per(FEED_STREAM_BATCH)
+    batch = []
+    for post in rows:
+        batch.append(post)
+        if len(batch) >= FEED_STREAM_BATCH:
+            for fragment in render_posts(batch):
+                yield fragment + '\n'
+            batch = []
+    for fragment in render_posts(batch):
+        yield fragment + '\n'
+
 @feed_bp.route('/', methods=['GET'])
 def get_feed():
-    # Fetch all posts, newest first
-    posts = Post.query.order_by(Post.created_at.desc()).all()
-    posts_data = []
-    for post in posts:
-        post_dict = post.to_dict()
-        user = User.query.filter_by(email=post.user_email).first()
-        post_dict['user'] = {
-            'name': user.username if user else 'Unknown User',
-            'email': post.user_email
-        }
-        post_dict['comments_count'] = 0
-        posts_data.append(post_dict)
-    return jsonify({'posts': posts_data}), 200 
\ No newline at end of file
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        per_page = min(request.args.get('per_page', 10, type=int), 50)
+        return cursor_page_response(Post.query, 'created_at', cursor, per_page)
+
+    # Newest first, bounded so the response never grows with the table
+    query = Post.query.order_by(Post.created_at.desc(), Post.id.desc())
+    limit = max(request.args.get('limit', FEED_DEFAULT_LIMIT, type=int), 1)
+
+    if wants_ndjson():
+        limit = min(limit, FEED_STREAM_MAX_LIMIT)
+        return Response(stream_with_context(stream_feed(query, limit)), mimetype='application/x-ndjson')
+
+    limit = min(limit, FEED_MAX_LIMIT)
+    return posts_response(render_posts(query.limit(limit).all()), limit=limit), 200
+
+@feed_bp.route('/home', methods=['GET'])
+@jwt_required()
+def get_home_timeline():
+    """Posts from the user and the authors they follow, newest first"""
+    email = get_jwt_identity()
+    limit = min(max(request.args.get('limit', FEED_DEFAULT_LIMIT, type=int), 1), FEED_MAX_LIMIT)
+    before_id = request.args.get('cursor', type=int)
+    
+    post_ids, next_cursor = timelines.home_timeline(email, before_id, limit)
+    posts_by_id = {post.id: post for post in Post.query.filter(Post.id.in_(post_ids)).all()} if post_ids else {}
+    posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+    
+    return posts_response(render_posts(posts), pagination={
+        'per_page': limit,
+        'next_cursor': str(next_cursor) if next_cursor else None,
+        'has_next': next_cursor is not None
+    }), 200
+
+@feed_bp.route('/follow/<path:followee_email>', methods=['POST'])
+@jwt_required()
+def follow_user(followee_email):
+    email = get_jwt_identity()
+    if followee_email == email:
+        return jsonify({'msg': 'You cannot follow yourself'}), 400
+    if not db.session.get(User, followee_email):
+        return jsonify({'msg': 'User not found'}), 404
+    if db.session.get(Follow, (email, followee_email)):
+        return jsonify({'msg': 'Already following'}), 200
+    try:
+        timelines.follow(email, followee_email)
+    except IntegrityError:
+        # A concurrent request followed first
+        db.session.rollback()
+        return jsonify({'msg': 'Already following'}), 200
+    return jsonify({'msg': 'Followed successfully'}), 201
+
+@feed_bp.route('/follow/<path:followee_email>', methods=['DELETE'])
+@jwt_required()
+def unfollow_user(followee_email):
+    email = get_jwt_identity()
+    if followee_email == email:
+        # Would delete the caller's own posts from their timeline
+        return jsonify({'msg': 'You cannot unfollow yourself'}), 400
+    timelines.unfollow(email, followee_email)
+    return jsonify({'msg': 'Unfollowed successfully'}), 200
@@ -0,0 +1,30 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import db
+from models.media_job import MediaJob
+from services.direct_uploads import UPLOAD_KINDS, issue_upload
+
+media_bp = Blueprint('media', __name__)
+
+# NOTE: Define routes as '/something', not '/api/something'. The blueprint is registered with '/api/media'.
+
+@media_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """Issue signed fields for uploading one file straight to storage"""
+    email = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind', 'post')
+    if kind not in UPLOAD_KINDS:
+        return jsonify({'msg': 'Invalid upload kind'}), 400
+    return jsonify(issue_upload(kind, email)), 201
+
+@media_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_media_job(job_id):
+    """Poll the status of a background media upload"""
+    email = get_jwt_identity()
+    job = db.session.get(MediaJob, job_id)
+    if not job or job.owner_email != email:
+        return jsonify({'msg': 'Upload job not found'}), 404
+    return jsonify(job.to_dict()), 200
@@ -1,37 +1,37 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import db
-from models.user import User
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from extensions import db, cache
 from models.post import Post
-import os, time
-from werkzeug.utils import secure_filename
-from PIL import Image
-from sqlalchemy import or_, desc, asc
-import re
-import cloudinary
-import cloudinary.uploader
+from models.post_tag import PostTag
+from services.post_serializer import posts_response, render_posts, serialize_post
+from services.pagination import cursor_page_response, invalidate_totals, offset_page, order_posts
+from services.search import apply_search, order_by_relevance
+from services.view_counter import view_counter
+from services.http_cache import bump_posts_version, conditional, conditional_response, make_etag, posts_version
+from services.likes import add_like, delete_likes, like_totals
+from services import timelines
+from services.trending import delete_score, order_by_trending, refresh_if_stale, score_new_post
+from services.direct_uploads import InvalidUpload, verify_reference
+from services.media_jobs import media_pipeline
+from services.media_store import release, store_upload
+from services.media_variants import InvalidImage, check_image_pixels
+from services.upload_limits import limit_upload
+from services.media_storage import resource_type_for
+from services.tags import TAG_WINDOWS, popular_tags, update_tag_counts
 
 posts_bp = Blueprint('posts', __name__)
 
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm'}
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
+# File types accepted by content, as sniffed from their first bytes
+ALLOWED_MEDIA_TYPES = {'png', 'jpg', 'mp4', 'webm'}
 
-CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME', 'dmspcref3')
-CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY', '761459965218136')
-CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET', 'G6YHFTGxFXRC2Sh7bjZANBkeZZ4')
-
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET
-)
-
-# Simple in-memory cache for categories and tags
-_categories_cache = None
-_popular_tags_cache = None
-_cache_timestamp = 0
-CACHE_DURATION = 300  # 5 minutes
+# Categories and popular tags are cached in the shared 'posts' cache namespace
+CACHE_NAMESPACE = 'posts'
+CATEGORIES_CACHE_TTL = 300  # 5 minutes
+POPULAR_TAGS_CACHE_TTL = 300
+PUBLIC_POSTS_MAX_AGE = 30  # Cache-Control max-age for public post responses
 
 def allowed_file(filename):
     ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
@@ -42,17 +42,19 @@ def is_image(filename):
     return ext in ALLOWED_IMAGE_EXTENSIONS
 
 def invalidate_cache():
-    global _categories_cache, _popular_tags_cache, _cache_timestamp
-    _categories_cache = None
-    _popular_tags_cache = None
-    _cache_timestamp = 0
+    # Bumps the namespace versions, so every worker sees the invalidation
+    cache.invalidate(CACHE_NAMESPACE)
+    invalidate_totals()
+    bump_posts_version()
 
 @posts_bp.route('/', methods=['POST'])
 @jwt_required()
+@limit_upload(MAX_FILE_SIZE, ALLOWED_MEDIA_TYPES)
 def create_post():
+    job = None
     try:
         email = get_jwt_identity()
-        user = User.query.filter_by(email=email).first()
+        user = current_user
         if not user:
             return jsonify({'msg': 'User not found'}), 404
         
@@ -71,25 +73,34 @@ def create_post():
         
         media_url = None
         media_type = None
-        if 'media' in request.files:
+        media_status = None
+        media_variants = None
+        if request.form.get('media_public_id'):
+            # Uploaded straight to storage; only the signed reference comes through here
+            try:
+                media_url, media_type = verify_reference(
+                    'post', email, request.form.get('media_public_id'), request.form.get('media_version'),
+                    request.form.get('media_signature')
+                )
+            except InvalidUpload as e:
+                return jsonify({'msg': str(e)}), 400
+            media_status = 'ready'
+        elif 'media' in request.files:
             file = request.files['media']
             if file.filename == '':
                 return jsonify({'msg': 'No selected file'}), 400
             if not allowed_file(file.filename):
                 return jsonify({'msg': 'Invalid file type'}), 400
-            file.seek(0, os.SEEK_END)
-            file_length = file.tell()
-            file.seek(0)
-            if file_length > MAX_FILE_SIZE:
-                return jsonify({'msg': 'File too large'}), 400
-            ext = file.filename.rsplit('.', 1)[1].lower() if file.filename and '.' in file.filename else ''
-            # Upload to Cloudinary
-            resource_type = 'video' if ext in ['mp4', 'webm', 'avi', 'mov'] else 'image'
-            upload_result = cloudinary.uploader.upload(file, folder='post_media', public_id=f"{int(time.time())}_{email.replace('@','_')}", overwrite=True, resource_type=resource_type)
-            media_url = upload_result.get('secure_url')
-            if not media_url:
-                return jsonify({'msg': 'Media upload failed'}), 500
-            media_type = upload_result.get('resource_type', resource_type)
+            # Size and type were enforced while the body streamed in
+            if resource_type_for(file.stream.sniffed) == 'image':
+                try:
+                    check_image_pixels(file.stream, current_app.config['MEDIA_MAX_IMAGE_PIXELS'])
+                except InvalidImage as e:
+                    return jsonify({'msg': str(e)}), 400
+            # Identical content reuses the stored asset; new content is
+            # spooled and uploaded by the background pipeline
+            asset, job = store_upload(file, 'post', email)
+            media_url, media_type, media_status, media_variants = asset.url, asset.resource_type, asset.status, asset.variants
         
         post = Post(
             user_email=email, 
@@ -97,20 +108,32 @@ def create_post():
             content=content, 
             media_url=media_url, 
             media_type=media_type,
+            media_status=media_status,
+            media_variants=media_variants,
             allow_comments=allow_comments, 
             is_public=is_public,
-            category=category if category else None,
-            tags=tags if tags else None
+            category=category if category else None
         )
+        post.set_tags(tags)
         db.session.add(post)
+        update_tag_counts(post.tags, post.created_at, 1)
+        db.session.flush()
+        # Push into followers' home timelines in the same transaction
+        timelines.fan_out_post(post)
+        score_new_post(post)
         db.session.commit()
         
         # Invalidate cache when new post is created
         invalidate_cache()
         
-        return jsonify(post.to_dict()), 201
+        data = post.to_dict()
+        if job:
+            media_pipeline.enqueue(job.id)
+            data['media_job_id'] = job.id
+        return jsonify(data), 202 if data['media_status'] == 'pending' else 201
     except Exception as e:
         db.session.rollback()
+        media_pipeline.discard(job)
         print(f"Post creation error: {str(e)}")
         return jsonify({'msg': 'Post creation failed', 'error': str(e)}), 500
 
@@ -120,6 +143,7 @@ def create_post_no_slash():
     return create_post()
 
 @posts_bp.route('/public', methods=['GET'])
+@conditional(lambda: ('public_posts', posts_version()), max_age=PUBLIC_POSTS_MAX_AGE)
 def list_public_posts():
     """List public posts - no authentication required"""
     # Get query parameters
@@ -128,67 +152,41 @@ def list_public_posts():
     search = request.args.get('search', '').strip()
     category = request.args.get('category', '').strip()
     tag = request.args.get('tag', '').strip()
-    sort = request.args.get('sort', 'created_at')
+    sort = request.args.get('sort', 'relevance' if search else 'created_at')
     
     # Build query - only public posts
     query = Post.query.filter(Post.is_public == True)
     
     # Apply filters
+    rank = None
     if search:
-        search_filter = or_(
-            Post.title.ilike(f'%{search}%'),
-            Post.content.ilike(f'%{search}%')
-        )
-        query = query.filter(search_filter)
+        query, rank = apply_search(query, search)
     
     if category:
         query = query.filter(Post.category == category)
     
     if tag:
-        query = query.filter(Post.tags.ilike(f'%{tag}%'))
+        query = query.join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag == PostTag.normalize(tag))
+    
+    # Cursor (keyset) mode: constant cost per page, no COUNT(*)
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        return cursor_page_response(query, sort, cursor, per_page)
     
     # Apply sorting
-    if sort == 'likes':
-        query = query.order_by(desc(Post.likes))
-    elif sort == 'views':
-        query = query.order_by(desc(Post.views))
-    elif sort == 'created_at':
-        query = query.order_by(desc(Post.created_at))
+    if sort == 'relevance':
+        query = order_by_relevance(query, rank)
+    elif sort == 'trending':
+        refresh_if_stale()
+        query = order_by_trending(query)
     else:
-        query = query.order_by(desc(Post.created_at))
-    
-    # Apply pagination
-    pagination = query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
+        query = order_posts(query, sort)
     
-    posts = pagination.items
+    # Apply pagination (total is cached, estimated or skipped per ?with_total=)
+    posts, pagination = offset_page(query, page, per_page)
     
-    # Convert to dict and add user info
-    posts_data = []
-    for post in posts:
-        post_dict = post.to_dict()
-        user = User.query.filter_by(email=post.user_email).first()
-        post_dict['user'] = {
-            'name': user.username if user else 'Unknown User',
-            'email': post.user_email
-        }
-        post_dict['comments_count'] = 0
-        posts_data.append(post_dict)
-    
-    return jsonify({
-        'posts': posts_data,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
-        }
-    }), 200
+    # Assemble from cached per-post JSON fragments (authors resolved in one query)
+    return posts_response(render_posts(posts), pagination=pagination), 200
 
 @posts_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -200,18 +198,15 @@ def list_posts():
     category = request.args.get('category', '').strip()
     visibility = request.args.get('visibility', '').strip()
     tag = request.args.get('tag', '').strip()
-    sort = request.args.get('sort', 'created_at')
+    sort = request.args.get('sort', 'relevance' if search else 'created_at')
     
     # Build query
     query = Post.query
     
     # Apply filters
+    rank = None
     if search:
-        search_filter = or_(
-            Post.title.ilike(f'%{search}%'),
-            Post.content.ilike(f'%{search}%')
-        )
-        query = query.filter(search_filter)
+        query, rank = apply_search(query, search)
     
     if category:
         query = query.filter(Post.category == category)
@@ -223,108 +218,59 @@ def list_posts():
             query = query.filter(Post.is_public == False)
     
     if tag:
-        query = query.filter(Post.tags.ilike(f'%{tag}%'))
+        query = query.join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag == PostTag.normalize(tag))
+    
+    # Cursor (keyset) mode: constant cost per page, no COUNT(*)
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        return cursor_page_response(query, sort, cursor, per_page)
     
     # Apply sorting
-    if sort == 'likes':
-        query = query.order_by(desc(Post.likes))
-    elif sort == 'views':
-        query = query.order_by(desc(Post.views))
-    elif sort == 'created_at':
-        query = query.order_by(desc(Post.created_at))
+    if sort == 'relevance':
+        query = order_by_relevance(query, rank)
+    elif sort == 'trending':
+        refresh_if_stale()
+        query = order_by_trending(query)
     else:
-        query = query.order_by(desc(Post.created_at))
-    
-    # Apply pagination
-    pagination = query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
+        query = order_posts(query, sort)
     
-    posts = pagination.items
+    # Apply pagination (total is cached, estimated or skipped per ?with_total=)
+    posts, pagination = offset_page(query, page, per_page)
     
-    # Convert to dict and add user info
-    posts_data = []
-    for post in posts:
-        post_dict = post.to_dict()
-        user = User.query.filter_by(email=post.user_email).first()
-        post_dict['user'] = {
-            'name': user.username if user else 'Unknown User',
-            'email': post.user_email
-        }
-        # Add comments count (placeholder for now)
-        post_dict['comments_count'] = 0
-        posts_data.append(post_dict)
-    
-    return jsonify({
-        'posts': posts_data,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
-        }
-    }), 200
+    # Assemble from cached per-post JSON fragments (authors resolved in one query)
+    return posts_response(render_posts(posts), pagination=pagination), 200
 
 @posts_bp.route('/categories', methods=['GET'])
 @jwt_required()
+@conditional(lambda: ('categories', cache.backend.get_version(CACHE_NAMESPACE)), max_age=CATEGORIES_CACHE_TTL, public=False)
 def get_categories():
-    global _categories_cache, _cache_timestamp
-    
-    # Check cache
-    current_time = time.time()
-    if _categories_cache and (current_time - _cache_timestamp) < CACHE_DURATION:
-        return jsonify({'categories': _categories_cache}), 200
-    
-    # Query database
-    categories = db.session.query(Post.category).filter(
-        Post.category.isnot(None),
-        Post.category != ''
-    ).distinct().all()
-    
-    category_list = [cat[0] for cat in categories if cat[0]]
-    
-    # Update cache
-    _categories_cache = category_list
-    _cache_timestamp = current_time
-    
+    def load_categories():
+        categories = db.session.query(Post.category).filter(
+            Post.category.isnot(None),
+            Post.category != ''
+        ).distinct().all()
+        return [cat[0] for cat in categories if cat[0]]
+    
+    category_list = cache.get_or_set(CACHE_NAMESPACE, 'categories', load_categories, CATEGORIES_CACHE_TTL)
     return jsonify({'categories': category_list}), 200
 
 @posts_bp.route('/popular-tags', methods=['GET'])
 @jwt_required()
+@conditional(lambda: ('popular_tags', cache.backend.get_version(CACHE_NAMESPACE)), max_age=POPULAR_TAGS_CACHE_TTL, public=False)
 def get_popular_tags():
-    global _popular_tags_cache, _cache_timestamp
-    
-    # Check cache
-    current_time = time.time()
-    if _popular_tags_cache and (current_time - _cache_timestamp) < CACHE_DURATION:
-        return jsonify({'tags': _popular_tags_cache}), 200
-    
-    # Query database for all tags
-    posts_with_tags = Post.query.filter(
-        Post.tags.isnot(None),
-        Post.tags != ''
-    ).all()
-    
-    # Count tag frequency
-    tag_counts = {}
-    for post in posts_with_tags:
-        if post.tags:
-            tags = [tag.strip() for tag in post.tags.split(',') if tag.strip()]
-            for tag in tags:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-    
-    # Sort by frequency and get top 20
-    popular_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:20]
-    tag_list = [tag for tag, count in popular_tags]
-    
-    # Update cache
-    _popular_tags_cache = tag_list
-    _cache_timestamp = current_time
+    # Optional time window, e.g. ?window=week for "popular this week"
+    window = request.args.get('window', '').strip()
+    if window:
+        if window not in TAG_WINDOWS:
+            return jsonify({'msg': f"window must be one of: {', '.join(TAG_WINDOWS)}"}), 400
+        tag_list = cache.get_or_set(
+            CACHE_NAMESPACE, f'popular_tags:{window}',
+            lambda: popular_tags(TAG_WINDOWS[window]), POPULAR_TAGS_CACHE_TTL
+        )
+        return jsonify({'tags': tag_list, 'window': window}), 200
     
+    # Top 20 from the incrementally maintained tag counters
+    tag_list = cache.get_or_set(CACHE_NAMESPACE, 'popular_tags', popular_tags, POPULAR_TAGS_CACHE_TTL)
     return jsonify({'tags': tag_list}), 200
 
 @posts_bp.route('/<int:post_id>', methods=['GET'])
@@ -345,44 +291,41 @@ def get_post(post_id):
         except:
             return jsonify({'msg': 'Post is private'}), 403
     
-    # Increment view count
-    post.views = (post.views or 0) + 1
-    db.session.commit()
+    # Buffer the view; it is written in a batched UPDATE by the view counter
+    view_counter.record(post.id)
     
-    # Convert to dict and add user info
-    post_dict = post.to_dict()
-    user = User.query.filter_by(email=post.user_email).first()
-    post_dict['user'] = {
-        'name': user.username if user else 'Unknown User',
-        'email': post.user_email
-    }
-    post_dict['comments_count'] = 0
+    # Convert to dict and add user info, counting views not yet flushed
+    def build():
+        post_dict = serialize_post(post)
+        post_dict['views'] = (post.views or 0) + view_counter.pending(post.id)
+        return post_dict
     
-    return jsonify(post_dict), 200
+    # The row version moves on every write to this post, view flushes included
+    etag = make_etag('post', post.id, post.version)
+    return conditional_response(etag, build, max_age=PUBLIC_POSTS_MAX_AGE if post.is_public else 0, public=post.is_public)
 
 @posts_bp.route('/<int:post_id>/like', methods=['POST'])
+@jwt_required()
 def like_post(post_id):
-    """Like a post - works for public posts without authentication"""
+    """Like a post - one like per authenticated user"""
+    email = get_jwt_identity()
     post = Post.query.get(post_id)
     if not post:
         return jsonify({'msg': 'Post not found'}), 404
     
-    # Check if post is public
-    if not post.is_public:
-        # For private posts, require authentication
-        try:
-            from flask_jwt_extended import get_jwt_identity
-            email = get_jwt_identity()
-            if email != post.user_email:
-                return jsonify({'msg': 'Post is private'}), 403
-        except:
-            return jsonify({'msg': 'Post is private'}), 403
+    # Private posts can only be liked by their author
+    if not post.is_public and email != post.user_email:
+        return jsonify({'msg': 'Post is private'}), 403
     
-    # Increment likes
-    post.likes = (post.likes or 0) + 1
-    db.session.commit()
+    # Ledger insert and atomic increment in one transaction
+    liked = add_like(post_id, email)
+    if liked:
+        bump_posts_version()
+    likes = like_totals([post_id]).get(post_id, 0)
+    if not liked:
+        return jsonify({'msg': 'Post already liked', 'likes': likes}), 200
     
-    return jsonify({'msg': 'Post liked successfully', 'likes': post.likes}), 200
+    return jsonify({'msg': 'Post liked successfully', 'likes': likes}), 200
 
 @posts_bp.route('/<int:post_id>', methods=['DELETE'])
 @jwt_required()
@@ -393,14 +336,12 @@ def delete_post(post_id):
         return jsonify({'msg': 'Post not found'}), 404
     if post.user_email != email:
         return jsonify({'msg': 'Unauthorized'}), 403
-    # Delete media file if exists
-    if post.media_url:
-        filename = post.media_url.split('/')[-1]
-        # Cloudinary deletion
-        try:
-            cloudinary.uploader.destroy(filename)
-        except Exception as e:
-            print(f"Error deleting media from Cloudinary: {e}")
+    # Storage deletes are queued for the media reaper, off the request path
+    release(post.media_url)
+    update_tag_counts(post.tags, post.created_at, -1)
+    delete_likes(post.id)
+    timelines.remove_post(post)
+    delete_score(post.id)
     db.session.delete(post)
     db.session.commit()
     invalidate_cache()
@@ -1,29 +1,23 @@
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from extensions import db
-from models.user import User
 from models.profile import Profile
-import os, time, json
+import os, json
 from werkzeug.utils import secure_filename
-from PIL import Image
 import mimetypes
-import cloudinary
-import cloudinary.uploader
+from services.direct_uploads import InvalidUpload, verify_reference
+from services.media_jobs import media_pipeline
+from services.media_store import release, store_upload
+from services.media_variants import InvalidImage, check_image_pixels
+from services.upload_limits import limit_upload
 
 profile_bp = Blueprint('profile', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# File types accepted by content, as sniffed from their first bytes
+ALLOWED_IMAGE_TYPES = {'png', 'jpg'}
 
-CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME', 'dmspcref3')
-CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY', '761459965218136')
-CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET', 'G6YHFTGxFXRC2Sh7bjZANBkeZZ4')
-
-cloudinary.config(
-    cloud_name=CLOUDINARY_CLOUD_NAME,
-    api_key=CLOUDINARY_API_KEY,
-    api_secret=CLOUDINARY_API_SECRET
-)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -42,7 +36,7 @@ def ratelimit_handler(e):
 def get_profile():
     try:
         email = get_jwt_identity()
-        user = User.query.filter_by(email=email).first()
+        user = current_user
         if not user:
             return jsonify({'msg': 'User not found'}), 404
         if not user.profile:
@@ -51,11 +45,16 @@ def get_profile():
             db.session.commit()
             return jsonify(profile.to_dict()), 200
         
-        # Ensure avatar URL is absolute
+        # Ensure avatar URLs (and their variants) are absolute
         profile_data = user.profile.to_dict()
-        if profile_data.get('avatar') and not profile_data['avatar'].startswith('http'):
-            backend_url = os.environ.get('BACKEND_URL', 'https://prok-professional-networking-t19l.onrender.com')
-            profile_data['avatar'] = f"{backend_url}{profile_data['avatar']}"
+        backend_url = os.environ.get('BACKEND_URL', 'https://prok-professional-networking-t19l.onrender.com')
+        absolute = lambda url: url if url.startswith('http') else f"{backend_url}{url}"
+        if profile_data.get('avatar'):
+            profile_data['avatar'] = absolute(profile_data['avatar'])
+        profile_data['avatarVariants'] = {
+            name: {fmt: absolute(url) for fmt, url in formats.items()}
+            for name, formats in profile_data['avatarVariants'].items()
+        }
         
         return jsonify(profile_data), 200
     except Exception as e:
@@ -69,7 +68,7 @@ def update_profile():
     import json
     try:
         email = get_jwt_identity()
-        user = User.query.filter_by(email=email).first()
+        user = current_user
         if not user:
             return jsonify({'msg': 'User not found'}), 404
         
@@ -163,12 +162,33 @@ def options_upload():
 
 @profile_bp.route('/image', methods=['POST'])
 @jwt_required()
+@limit_upload(MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES)
 def upload_image():
+    job = None
     try:
         email = get_jwt_identity()
-        user = User.query.filter_by(email=email).first()
+        user = current_user
         if not user:
             return jsonify({'msg': 'User not found'}), 404
+        reference = request.get_json(silent=True)
+        if reference:
+            # Uploaded straight to storage; only the signed reference comes through here
+            try:
+                image_url, _ = verify_reference(
+                    'avatar', email, reference.get('public_id'), reference.get('version'),
+                    reference.get('signature')
+                )
+            except InvalidUpload as e:
+                return jsonify({'msg': str(e)}), 400
+            profile = user.profile or Profile(user_email=email)
+            if profile.avatar != image_url:
+                release(profile.avatar)
+            profile.avatar = image_url
+            profile.avatar_variants = None
+            if not user.profile:
+                db.session.add(profile)
+            db.session.commit()
+            return jsonify({'url': profile.avatar, 'status': 'ready'}), 200
         if 'image' not in request.files:
             return jsonify({'msg': 'No file part'}), 400
         file = request.files['image']
@@ -176,23 +196,28 @@ def upload_image():
             return jsonify({'msg': 'No selected file'}), 400
         if not allowed_file(file.filename):
             return jsonify({'msg': 'Invalid file type'}), 400
-        file.seek(0, os.SEEK_END)
-        file_length = file.tell()
-        file.seek(0)
-        if file_length > MAX_FILE_SIZE:
-            return jsonify({'msg': 'File too large'}), 400
-        # Upload to Cloudinary
-        upload_result = cloudinary.uploader.upload(file, folder='profile_images', public_id=f"{int(time.time())}_{email.replace('@','_')}", overwrite=True, resource_type="image")
-        image_url = upload_result.get('secure_url')
-        if not image_url:
-            return jsonify({'msg': 'Image upload failed'}), 500
+        # Size and type were enforced while the body streamed in
+        try:
+            check_image_pixels(file.stream, current_app.config['MEDIA_MAX_IMAGE_PIXELS'])
+        except InvalidImage as e:
+            return jsonify({'msg': str(e)}), 400
+        # Identical content reuses the stored asset; new content is
+        # spooled and uploaded by the background pipeline
+        asset, job = store_upload(file, 'avatar', email)
         profile = user.profile or Profile(user_email=email)
-        profile.avatar = image_url
+        # Take the new reference before dropping the old one, which may be the same asset
+        release(profile.avatar)
+        profile.avatar = asset.url
+        profile.avatar_variants = asset.variants
         if not user.profile:
             db.session.add(profile)
         db.session.commit()
-        response = jsonify({'url': profile.avatar})
-        return response, 200
+        response = {'url': profile.avatar, 'status': asset.status}
+        if job:
+            media_pipeline.enqueue(job.id)
+            response['job_id'] = job.id
+        return jsonify(response), 202 if response['status'] == 'pending' else 200
     except Exception as e:
         db.session.rollback()
+        media_pipeline.discard(job)
         return jsonify({'msg': 'Image upload failed', 'error': str(e)}), 500 
\ No newline at end of file
@@ -1,12 +1,25 @@
 from flask import Flask, request, jsonify
 from config import Config
-from extensions import init_extensions, db
-from api import auth, feed, jobs, messaging, posts, profile
+from extensions import init_extensions, db, cache
+from api import auth, feed, jobs, media, messaging, posts, profile
+from services.search import init_search
+from services.view_counter import view_counter
+from services.media_jobs import media_pipeline
+from services.media_reaper import media_reaper
+from services.passwords import password_hasher
+import services.identity  # noqa: F401  registers the JWT user loader
+from services.media_storage import check_signing_secret
+from services.upload_limits import UploadRequest
+from fake_storage_server import fake_storage_bp
+from services.likes import fold_like_shards
+from services.trending import recompute as recompute_trending
 from flask_cors import CORS
+from sqlalchemy import inspect
 
 def create_app(config_class=Config):
     """Application factory pattern"""
     app = Flask(__name__)
+    app.request_class = UploadRequest
     app.config.from_object(config_class)
     
     # Apply CORS globally for the deployed frontend and localhost
@@ -20,18 +33,52 @@ def create_app(config_class=Config):
     
     # Initialize extensions
     init_extensions(app)
+    view_counter.init_app(app)
+    media_pipeline.init_app(app)
+    media_reaper.init_app(app)
+    password_hasher.init_app(app)
     
     # Register blueprints
     app.register_blueprint(auth.auth_bp, url_prefix='/api/auth')
     app.register_blueprint(feed.feed_bp, url_prefix='/api/feed')
     app.register_blueprint(jobs.jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(media.media_bp, url_prefix='/api/media')
     app.register_blueprint(messaging.messaging_bp, url_prefix='/api/messaging')
     app.register_blueprint(posts.posts_bp, url_prefix='/api/posts')
     app.register_blueprint(profile.profile_bp, url_prefix='/api/profile')
+    # Receives direct uploads and serves files, only when media is stored locally;
+    # that is also the only backend whose URLs MEDIA_SIGNING_SECRET signs
+    if app.config.get('MEDIA_STORAGE') == 'local':
+        check_signing_secret(app)
+        app.register_blueprint(fake_storage_bp, url_prefix='/uploads')
     
-    # Create database tables
+    # Migrations own the schema of an existing database (run `flask db upgrade`
+    # before booting new code on it); only an empty one is created from the models
     with app.app_context():
-        db.create_all()
+        if not inspect(db.engine).get_table_names():
+            db.create_all()
+            print("Created a new database; run `flask db stamp heads` so later migrations apply")
+        init_search(db.engine)
+
+    @app.cli.command('fold-like-shards')
+    def fold_like_shards_command():
+        """Fold sharded like counters into posts.likes (run periodically)"""
+        print(f"Folded {fold_like_shards()} like shard(s)")
+
+    @app.cli.command('recompute-trending')
+    def recompute_trending_command():
+        """Rescore posts with activity since the last run (run periodically)"""
+        print(f"Rescored {recompute_trending()} post(s)")
+
+    @app.cli.command('recover-media-jobs')
+    def recover_media_jobs_command():
+        """Re-enqueue media uploads left pending by dead workers"""
+        print(f"Recovered {media_pipeline.recover()} media job(s)")
+
+    @app.cli.command('reap-media')
+    def reap_media_command():
+        """Delete queued media from storage in bulk batches"""
+        print(f"Deleted {media_reaper.reap()} stored file(s)")
 
     @app.route('/', methods=['GET'])
     def index():
@@ -48,7 +95,8 @@ def create_app(config_class=Config):
         return jsonify({
             'status': 'healthy',
             'message': 'Backend is running properly',
-            'timestamp': request.environ.get('REQUEST_TIME', 'unknown')
+            'timestamp': request.environ.get('REQUEST_TIME', 'unknown'),
+            'cache': cache.stats()
         }), 200
 
     @app.before_request
@@ -77,6 +125,10 @@ def create_app(config_class=Config):
     def method_not_allowed(error):
         return jsonify({'error': 'Method Not Allowed', 'message': 'HTTP method not supported'}), 405
 
+    @app.errorhandler(429)
+    def too_many_requests(error):
+        return jsonify({'error': 'Too Many Requests', 'message': str(error.description)}), 429
+
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({'error': 'Internal Server Error', 'message': 'Something went wrong'}), 500
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark.
+
+Fires CONCURRENCY parallel login requests (LOGINS in total) at an
+in-process app on a throwaway SQLite database, while one client keeps
+polling /health. Reports login throughput and latency, and how long the
+cheap endpoint waits during the burst. Compare PASSWORD_HASH_METHOD and
+PASSWORD_HASH_WORKERS settings.
+
+Usage (from app/backend):
+    python benchmark_login.py
+    PASSWORD_HASH_METHOD=pbkdf2:sha256:600000 PASSWORD_HASH_WORKERS=4 python benchmark_login.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LOGINS = int(os.environ.get('LOGINS', 64))
+CONCURRENCY = int(os.environ.get('CONCURRENCY', 8))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault('MEDIA_SIGNING_SECRET', 'benchmark-only')  # Throwaway database, never served
+
+from app import create_app
+from extensions import limiter
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000
+
+
+def main():
+    app = create_app()
+    limiter.enabled = False
+    client = app.test_client()
+    credentials = {'email': 'bench@example.com', 'password': 'benchmark1'}
+    client.post('/api/auth/signup', json=dict(credentials, username='bench'))
+
+    def login(_):
+        started = time.perf_counter()
+        response = app.test_client().post('/api/auth/login', json=credentials)
+        assert response.status_code == 200, response.get_json()
+        return time.perf_counter() - started
+
+    health, done = [], threading.Event()
+
+    def poll_health():
+        poller = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            poller.get('/health')
+            health.append(time.perf_counter() - started)
+
+    poller = threading.Thread(target=poll_health)
+    poller.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        latencies = list(pool.map(login, range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    poller.join()
+
+    print(f"method={app.config['PASSWORD_HASH_METHOD']} hash_workers={app.config['PASSWORD_HASH_WORKERS']} "
+          f"logins={LOGINS} concurrency={CONCURRENCY}")
+    print(f"login throughput: {LOGINS / elapsed:.1f}/s")
+    print(f"login latency ms: p50={percentile(latencies, 0.5):.0f} p95={percentile(latencies, 0.95):.0f} "
+          f"mean={statistics.mean(latencies) * 1000:.0f}")
+    print(f"/health during burst ms: p50={percentile(health, 0.5):.1f} p95={percentile(health, 0.95):.1f} "
+          f"({len(health)} requests)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check that every posts listing query shape is served by an index.
+
+Runs EXPLAIN for the queries behind /api/posts, /api/posts/public,
+/api/feed and the side tables against the configured database (SQLite or
+PostgreSQL), and exits non-zero if any of them falls back to a full table
+scan or an unindexed sort.
+
+Usage (from app/backend):
+    DATABASE_URL=sqlite:///check.db python check_query_plans.py
+"""
+import json
+import sys
+from datetime import datetime
+from sqlalchemy import text, and_, or_
+from app import create_app
+from extensions import db
+from models.post import Post
+from models.post_tag import PostTag
+from models.tag_count import TagCount
+from models.timeline import TimelineEntry
+from services.pagination import order_posts, SORT_COLUMNS
+from services.trending import order_by_trending
+
+PAGE = 11  # per_page + 1, as fetched by the listings
+
+
+def query_shapes():
+    """(name, query, sort_allowed) tuples mirroring the filters and sorts the endpoints build."""
+    shapes = []
+    for sort in SORT_COLUMNS:
+        shapes.append((f'list_posts sort={sort}', order_posts(Post.query, sort)))
+        shapes.append((f'list_public_posts sort={sort}', order_posts(Post.query.filter(Post.is_public == True), sort)))
+    shapes.append(('list_posts visibility=private', order_posts(Post.query.filter(Post.is_public == False), 'created_at')))
+    shapes.append(('category filter', order_posts(Post.query.filter(Post.category == 'tech'), 'created_at')))
+    shapes.append(('public category filter', order_posts(
+        Post.query.filter(Post.is_public == True, Post.category == 'tech'), 'created_at')))
+    column = SORT_COLUMNS['created_at']
+    shapes.append(('keyset page', order_posts(Post.query.filter(Post.is_public == True).filter(or_(
+        column < datetime.utcnow(), and_(column == datetime.utcnow(), Post.id < 1000)
+    )), 'created_at')))
+    # Only the posts carrying the tag are sorted, after an indexed lookup
+    shapes.append(('tag filter', order_posts(
+        Post.query.join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag == 'python'), 'created_at'), True))
+    shapes.append(('feed', Post.query.order_by(Post.created_at.desc(), Post.id.desc())))
+    shapes.append(('author posts', Post.query.filter(Post.user_email == 'a@example.com').order_by(Post.id.desc())))
+    shapes.append(('list_posts sort=trending', order_by_trending(Post.query)))
+    # Without planner statistics SQLite drives this one from the is_public
+    # index; once ANALYZE has run on real data it walks ix_post_scores_score
+    shapes.append(('list_public_posts sort=trending', order_by_trending(Post.query.filter(Post.is_public == True)), True))
+    shapes.append(('popular tags', TagCount.query.filter(TagCount.count > 0).order_by(TagCount.count.desc())))
+    shapes.append(('home timeline', TimelineEntry.query.filter(
+        TimelineEntry.user_email == 'a@example.com', TimelineEntry.post_id < 1000
+    ).order_by(TimelineEntry.post_id.desc())))
+    return [(shape[0], shape[1].limit(PAGE), shape[2] if len(shape) > 2 else False) for shape in shapes]
+
+
+def compile_sql(query):
+    return str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+
+
+def sqlite_problems(conn, sql):
+    plan = [row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+    problems = [step for step in plan if step.startswith('SCAN') and 'USING' not in step]
+    sorts = [step for step in plan if 'TEMP B-TREE' in step]
+    return plan, problems, sorts
+
+
+def postgres_problems(conn, sql):
+    # Empty tables make sequential scans look cheapest; ask whether an index *can* serve the query
+    conn.execute(text('SET enable_seqscan = off'))
+    conn.execute(text('SET enable_sort = off'))
+    raw = conn.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    plan = raw if isinstance(raw, list) else json.loads(raw)
+    problems, sorts = [], []
+
+    def walk(node):
+        if node['Node Type'] == 'Seq Scan':
+            problems.append(f"Seq Scan on {node.get('Relation Name', '?')}")
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            sorts.append(node['Node Type'])
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return plan, problems, sorts
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect not in ('sqlite', 'postgresql'):
+            print(f"Unsupported database for plan checks: {dialect}")
+            return 2
+        check = sqlite_problems if dialect == 'sqlite' else postgres_problems
+        with db.engine.connect() as conn:
+            for name, query, sort_allowed in query_shapes():
+                plan, problems, sorts = check(conn, compile_sql(query))
+                if not sort_allowed:
+                    problems += sorts
+                if problems:
+                    failures += 1
+                    print(f"❌ {name}: {'; '.join(problems)}")
+                else:
+                    print(f"✅ {name}")
+    print(f"\n{failures} query shape(s) without index support on {dialect}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
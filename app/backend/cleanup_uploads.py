@@ -1,2 +1,35 @@
-# This script is now obsolete since all uploads use Cloudinary.
-# You can safely delete this file or leave it empty. 
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Reconcile stored media with the database and delete what nothing uses.
+
+Recounts media asset references from posts.media_url and profiles.avatar,
+queues assets and stored files that nothing references (and that are
+older than MEDIA_SWEEP_GRACE_SECONDS), then drains the deletion queue in
+bulk batches. Run it periodically, e.g. daily from cron.
+
+Usage (from app/backend):
+    python cleanup_uploads.py              # sweep, then delete
+    python cleanup_uploads.py --dry-run    # only report what would be deleted
+"""
+import argparse
+import sys
+from app import create_app
+from services.media_reaper import media_reaper
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='report orphans without queueing or deleting them')
+    parser.add_argument('--grace', type=int, default=None, help='override MEDIA_SWEEP_GRACE_SECONDS')
+    args = parser.parse_args()
+    app = create_app()
+    with app.app_context():
+        released, orphaned = media_reaper.sweep(args.grace, dry_run=args.dry_run)
+        print(f"{released} unreferenced asset(s), {orphaned} orphaned stored file(s)")
+        if not args.dry_run:
+            print(f"Deleted {media_reaper.reap(limit=sys.maxsize)} stored file(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from urllib.parse import quote_plus
 
@@ -28,6 +29,64 @@ class Config:
     # JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 30))  # Seconds a token's user and profile stay cached
+    
+    # Password hashing: Werkzeug method string (algorithm and cost); older hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # Concurrent hashes per worker; 0 hashes inline
+    
+    # Cache: 'memory' (per worker), 'sqlite' (shared by local workers) or 'redis'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DIR = os.environ.get('CACHE_DIR')  # Defaults to the system temp dir
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    
+    # Rate limits: counters shared by all workers; 'sqlite:///<path>' on one host, 'redis://...' across hosts
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'sqlite:///' + os.path.join(
+        os.environ.get('CACHE_DIR') or tempfile.gettempdir(), 'prok-ratelimit.sqlite3'))
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    RATELIMIT_APPLICATION = os.environ.get('RATELIMIT_APPLICATION', '300 per minute')  # Budget shared by all routes
+    RATELIMIT_UPLOAD_COST = int(os.environ.get('RATELIMIT_UPLOAD_COST', 10))  # Units per upload; cheap reads cost 1
+    RATELIMIT_SEARCH_COST = int(os.environ.get('RATELIMIT_SEARCH_COST', 3))  # Units per ?search= query
+    
+    # Post views are buffered per worker and flushed in batches
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 5))  # seconds
+    VIEW_FLUSH_THRESHOLD = int(os.environ.get('VIEW_FLUSH_THRESHOLD', 500))  # pending views
+    
+    # Likes: 0 increments posts.likes directly, N > 0 spreads them over N shard rows
+    LIKE_COUNTER_SHARDS = int(os.environ.get('LIKE_COUNTER_SHARDS', 0))
+    
+    # Home timelines: 'sql' (timeline_entries table) or 'redis'
+    TIMELINE_BACKEND = os.environ.get('TIMELINE_BACKEND', 'sql')
+    TIMELINE_REDIS_URL = os.environ.get('TIMELINE_REDIS_URL', 'redis://localhost:6379/1')
+    TIMELINE_MAX_ENTRIES = int(os.environ.get('TIMELINE_MAX_ENTRIES', 800))
+    # Authors with more followers are merged in at read time instead of fanned out
+    TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 5000))
+    
+    # Trending: 10x engagement is worth this many seconds of recency
+    TRENDING_DECAY_SECONDS = int(os.environ.get('TRENDING_DECAY_SECONDS', 45000))
+    TRENDING_REFRESH_SECONDS = int(os.environ.get('TRENDING_REFRESH_SECONDS', 60))
+    
+    # Default request body cap; upload routes set their own tighter limits
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 25 * 1024 * 1024))
+    
+    # Media: 'cloudinary' or 'local' (files under MEDIA_LOCAL_ROOT, served at /uploads/)
+    MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'cloudinary')
+    MEDIA_LOCAL_ROOT = os.environ.get('MEDIA_LOCAL_ROOT', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', '..', 'uploads')))
+    MEDIA_LOCAL_BASE_URL = os.environ.get('MEDIA_LOCAL_BASE_URL', '/uploads')  # Or a standalone fake_storage_server.py
+    MEDIA_SPOOL_DIR = os.environ.get('MEDIA_SPOOL_DIR')  # Defaults to the system temp dir
+    MEDIA_UPLOAD_WORKERS = int(os.environ.get('MEDIA_UPLOAD_WORKERS', 2))  # 0 uploads inline
+    MEDIA_JOB_STALE_SECONDS = int(os.environ.get('MEDIA_JOB_STALE_SECONDS', 900))  # Pending this long: its worker died
+    MEDIA_VARIANT_WORKERS = int(os.environ.get('MEDIA_VARIANT_WORKERS', 2))  # Processes; 0 resizes inline
+    MEDIA_MAX_IMAGE_PIXELS = int(os.environ.get('MEDIA_MAX_IMAGE_PIXELS', 40_000_000))  # Decompression bomb guard
+    # Queued storage deletes are drained every MEDIA_REAP_INTERVAL seconds (0 leaves it to `flask reap-media`)
+    MEDIA_REAP_INTERVAL = int(os.environ.get('MEDIA_REAP_INTERVAL', 60))
+    MEDIA_SWEEP_GRACE_SECONDS = int(os.environ.get('MEDIA_SWEEP_GRACE_SECONDS', 86400))  # Never reap newer files
+    # Direct-to-storage uploads: signed upload fields expire after MEDIA_UPLOAD_URL_TTL seconds
+    MEDIA_SIGNING_SECRET = os.environ.get('MEDIA_SIGNING_SECRET', SECRET_KEY)
+    MEDIA_UPLOAD_URL_TTL = int(os.environ.get('MEDIA_UPLOAD_URL_TTL', 600))
     
     # CORS
     CORS_HEADERS = 'Content-Type' 
\ No newline at end of file
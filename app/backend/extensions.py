@@ -1,20 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from services.cache import Cache
+from services.rate_limits import rate_limit_key, request_cost
 import os
 
+# The alembic scripts live at the repository root, beside app/
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'migrations')
+
 # Initialize extensions
 db = SQLAlchemy()
+migrate = Migrate()
 jwt = JWTManager()
+cache = Cache()
 
+# Per-route limits plus the RATELIMIT_APPLICATION budget shared by all routes, keyed and weighted per request
 limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["1000 per day", "200 per hour", "50 per minute"]
+    key_func=rate_limit_key,
+    default_limits=["1000 per day", "200 per hour", "50 per minute"],
+    default_limits_cost=request_cost,
+    application_limits_cost=request_cost,
 )
 
 def init_extensions(app):
     """Initialize all Flask extensions"""
     db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
     jwt.init_app(app)
     limiter.init_app(app)
+    cache.init_app(app)
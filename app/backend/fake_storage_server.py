@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Cloudinary's signed upload API (MEDIA_STORAGE=local).
+
+Accepts the signed form fields issued by POST /api/media/uploads together
+with a ``file`` part, stores the file under MEDIA_LOCAL_ROOT and answers
+like Cloudinary does: public_id, version, format and a response signature
+that create_post verifies. It also serves the stored files.
+
+With MEDIA_STORAGE=local the API mounts it at /uploads. To keep media bytes off the API workers in
+development too, run it on its own and point the API at it:
+
+    python fake_storage_server.py            # listens on FAKE_STORAGE_PORT (9000)
+    MEDIA_LOCAL_BASE_URL=http://localhost:9000/uploads python main.py
+"""
+import hmac
+import os
+import time
+from flask import Blueprint, Flask, current_app, jsonify, request, send_from_directory, url_for
+from flask_cors import CORS
+from config import Config
+from services.media_storage import check_signing_secret, resource_type_for, sign_params
+
+fake_storage_bp = Blueprint('fake_storage', __name__)
+
+SIGNED_FIELDS = ('public_id', 'resource_type', 'allowed_formats', 'max_bytes', 'expires')
+
+
+@fake_storage_bp.route('/upload', methods=['POST'])
+def upload():
+    fields = {key: request.form.get(key, '') for key in SIGNED_FIELDS}
+    secret = current_app.config['MEDIA_SIGNING_SECRET']
+    if not hmac.compare_digest(sign_params(secret, fields), request.form.get('signature', '')):
+        return jsonify({'error': {'message': 'Invalid Signature'}}), 401
+    if int(fields['expires'] or 0) < time.time():
+        return jsonify({'error': {'message': 'Stale request'}}), 401
+    file = request.files.get('file')
+    if not file or '.' not in (file.filename or ''):
+        return jsonify({'error': {'message': 'Missing file'}}), 400
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    if ext not in fields['allowed_formats'].split(',') or resource_type_for(ext) != fields['resource_type']:
+        return jsonify({'error': {'message': f'File format {ext} not allowed'}}), 400
+    target = os.path.join(current_app.config['MEDIA_LOCAL_ROOT'], *f"{fields['public_id']}.{ext}".split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    file.save(target)
+    size = os.path.getsize(target)
+    if size > int(fields['max_bytes']):
+        os.remove(target)
+        return jsonify({'error': {'message': 'File size too large'}}), 400
+    version = int(time.time())
+    return jsonify({
+        'public_id': fields['public_id'],
+        'version': version,
+        'format': ext,
+        'resource_type': fields['resource_type'],
+        'bytes': size,
+        'secure_url': url_for('fake_storage.uploaded_file', filename=f"{fields['public_id']}.{ext}", _external=True),
+        'signature': sign_params(secret, {'public_id': fields['public_id'], 'version': version})
+    }), 200
+
+
+@fake_storage_bp.route('/<path:filename>', methods=['GET'])
+def uploaded_file(filename):
+    return send_from_directory(current_app.config['MEDIA_LOCAL_ROOT'], filename, max_age=31536000)
+
+
+def create_fake_storage_app(config_class=Config):
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    check_signing_secret(app)
+    CORS(app)
+    app.register_blueprint(fake_storage_bp, url_prefix='/uploads')
+    return app
+
+
+if __name__ == '__main__':
+    create_fake_storage_app().run(port=int(os.environ.get('FAKE_STORAGE_PORT', 9000)))
@@ -3,7 +3,10 @@ import os
 # Gunicorn configuration file
 bind = "0.0.0.0:10000"
 workers = 2
-worker_class = "sync"
+# Threaded workers keep serving other endpoints while logins wait on the
+# bounded password-hashing pool (PASSWORD_HASH_WORKERS)
+worker_class = "gthread"
+threads = 4
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -19,4 +22,16 @@ loglevel = "info"
 # Environment
 raw_env = [
     "FLASK_ENV=production",
-] 
\ No newline at end of file
+] 
+
+def post_fork(server, worker):
+    """Start the image variant processes before the worker starts any threads, then resume stale media jobs"""
+    from services.media_jobs import media_pipeline
+    media_pipeline.start()
+
+def worker_exit(server, worker):
+    """Flush buffered post view counts and finish queued uploads before the worker goes away"""
+    from services.view_counter import view_counter
+    from services.media_jobs import media_pipeline
+    view_counter.flush()
+    media_pipeline.shutdown()
@@ -0,0 +1,12 @@
+from extensions import db
+from datetime import datetime
+
+class Follow(db.Model):
+    __tablename__ = 'follows'
+    follower_email = db.Column(db.String(120), db.ForeignKey('users.email'), primary_key=True)
+    followee_email = db.Column(db.String(120), db.ForeignKey('users.email'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_follows_followee_email', 'followee_email'),
+    )
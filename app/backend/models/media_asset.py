@@ -0,0 +1,22 @@
+from extensions import db
+from datetime import datetime
+
+class MediaAsset(db.Model):
+    """A stored media file, addressed by content digest and shared by every post or avatar using it."""
+    __tablename__ = 'media_assets'
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False)  # SHA-256 of the file
+    kind = db.Column(db.String(20), nullable=False)  # 'post' or 'avatar'
+    public_id = db.Column(db.String(255), nullable=False, unique=True)
+    resource_type = db.Column(db.String(20), nullable=False)
+    ext = db.Column(db.String(10), nullable=False)
+    url = db.Column(db.String(255), nullable=False, index=True)
+    variants = db.Column(db.Text, nullable=True)  # JSON: {name: {format: url}}
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, ready, failed
+    size = db.Column(db.Integer, nullable=True)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('digest', 'kind', name='uq_media_assets_digest_kind'),
+    )
@@ -0,0 +1,12 @@
+from extensions import db
+from datetime import datetime
+
+class MediaDeletion(db.Model):
+    """A stored file queued for deletion by the media reaper."""
+    __tablename__ = 'media_deletions'
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(255), nullable=False)
+    resource_type = db.Column(db.String(20), nullable=False)
+    queued_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
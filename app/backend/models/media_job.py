@@ -0,0 +1,29 @@
+from extensions import db
+from datetime import datetime
+
+class MediaJob(db.Model):
+    """A background upload of spooled media to storage."""
+    __tablename__ = 'media_jobs'
+    id = db.Column(db.String(36), primary_key=True)
+    owner_email = db.Column(db.String(120), db.ForeignKey('users.email'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'post' or 'avatar'
+    public_id = db.Column(db.String(255), nullable=False)
+    resource_type = db.Column(db.String(20), nullable=False)
+    ext = db.Column(db.String(10), nullable=False)
+    spool_path = db.Column(db.String(500), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done, failed
+    url = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'url': self.url,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
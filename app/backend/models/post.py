@@ -1,5 +1,8 @@
+import json
 from extensions import db
+from sqlalchemy import event
 from datetime import datetime
+from models.post_tag import PostTag
 
 class Post(db.Model):
     __tablename__ = 'posts'
@@ -8,16 +11,39 @@ class Post(db.Model):
     content = db.Column(db.Text, nullable=False)
     media_url = db.Column(db.String(255), nullable=True)
     media_type = db.Column(db.String(100), nullable=True)  # MIME type of media file
+    media_status = db.Column(db.String(20), nullable=True)  # pending, ready or failed while uploading
+    media_variants = db.Column(db.Text, nullable=True)  # JSON: {name: {format: url}} resized image variants
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     title = db.Column(db.String(255), nullable=False)
     allow_comments = db.Column(db.Boolean, default=True)
     is_public = db.Column(db.Boolean, default=True)
     category = db.Column(db.String(100), nullable=True)
     tags = db.Column(db.String(255), nullable=True)  # Comma-separated tags
-    likes = db.Column(db.Integer, default=0)
-    views = db.Column(db.Integer, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    views = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every change to the row; keys the rendered-post cache
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Composite indexes matching the listing filters and sorts; id is the
+    # keyset tie-breaker, and descending sorts scan these backwards
+    __table_args__ = (
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+        db.Index('ix_posts_likes_id', 'likes', 'id'),
+        db.Index('ix_posts_views_id', 'views', 'id'),
+        db.Index('ix_posts_public_created_at_id', 'is_public', 'created_at', 'id'),
+        db.Index('ix_posts_public_likes_id', 'is_public', 'likes', 'id'),
+        db.Index('ix_posts_public_views_id', 'is_public', 'views', 'id'),
+        db.Index('ix_posts_category_created_at_id', 'category', 'created_at', 'id'),
+        db.Index('ix_posts_user_email_id', 'user_email', 'id'),
+    )
 
     user = db.relationship('User', backref=db.backref('posts', lazy=True))
+    tag_links = db.relationship('PostTag', lazy=True, cascade='all, delete-orphan')
+
+    def set_tags(self, tags):
+        """Store the display string and keep the normalized post_tags rows in sync."""
+        self.tags = tags if tags else None
+        self.tag_links = [PostTag(tag=tag) for tag in PostTag.parse(tags)]
 
     def to_dict(self):
         return {
@@ -27,6 +53,8 @@ class Post(db.Model):
             'content': self.content,
             'media_url': self.media_url,
             'media_type': self.media_type,
+            'media_status': self.media_status,
+            'media_variants': json.loads(self.media_variants) if self.media_variants else {},
             'created_at': self.created_at.isoformat(),
             'allow_comments': self.allow_comments,
             'is_public': self.is_public,
@@ -35,3 +63,9 @@ class Post(db.Model):
             'likes': self.likes,
             'views': self.views
         }
+
+
+@event.listens_for(Post, 'before_update')
+def bump_post_version(mapper, connection, target):
+    # Increment in SQL so concurrent bulk updates (likes, views) are not lost
+    target.version = Post.version + 1
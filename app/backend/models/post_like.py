@@ -0,0 +1,16 @@
+from extensions import db
+from datetime import datetime
+
+class PostLike(db.Model):
+    """One row per (post, user) so each user can like a post only once."""
+    __tablename__ = 'post_likes'
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    user_email = db.Column(db.String(120), db.ForeignKey('users.email'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PostLikeShard(db.Model):
+    """Spread like increments for hot posts across several rows to avoid lock contention."""
+    __tablename__ = 'post_like_shards'
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
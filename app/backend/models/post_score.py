@@ -0,0 +1,10 @@
+from extensions import db
+from datetime import datetime
+
+class PostScore(db.Model):
+    """Precomputed trending score; ``dirty`` marks posts with activity since the last recompute."""
+    __tablename__ = 'post_scores'
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    dirty = db.Column(db.Boolean, nullable=False, default=True, index=True)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,23 @@
+from extensions import db
+
+class PostTag(db.Model):
+    """Normalized (lowercased) tag rows so tag filters are indexed equality joins."""
+    __tablename__ = 'post_tags'
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_post_tags_tag_post_id', 'tag', 'post_id'),
+    )
+
+    @staticmethod
+    def normalize(tag):
+        return tag.strip().lower()[:100]
+
+    @classmethod
+    def parse(cls, tags):
+        """Split a comma-separated tags string into unique normalized tags, keeping order."""
+        if not tags:
+            return []
+        normalized = (cls.normalize(tag) for tag in tags.split(','))
+        return list(dict.fromkeys(tag for tag in normalized if tag))
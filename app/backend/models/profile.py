@@ -5,6 +5,7 @@ class Profile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_email = db.Column(db.String(120), db.ForeignKey('users.email'), unique=True, nullable=False)
     avatar = db.Column(db.String(255))
+    avatar_variants = db.Column(db.Text)  # JSON: {name: {format: url}} resized avatar variants
     name = db.Column(db.String(120))
     title = db.Column(db.String(120))
     location = db.Column(db.String(120))
@@ -23,6 +24,7 @@ class Profile(db.Model):
         return {
             'id': self.id,
             'avatar': self.avatar,
+            'avatarVariants': json.loads(self.avatar_variants) if self.avatar_variants else {},
             'name': self.name,
             'title': self.title,
             'location': self.location,
@@ -0,0 +1,14 @@
+from extensions import db
+
+class TagCount(db.Model):
+    """All-time number of posts per normalized tag, maintained on post create/delete."""
+    __tablename__ = 'tag_counts'
+    tag = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+class TagDailyCount(db.Model):
+    """Per-day tag counts backing the time-windowed popular tags."""
+    __tablename__ = 'tag_daily_counts'
+    day = db.Column(db.Date, primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
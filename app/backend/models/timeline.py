@@ -0,0 +1,12 @@
+from extensions import db
+
+class TimelineEntry(db.Model):
+    """A post id materialized into a user's home timeline (fan-out-on-write)."""
+    __tablename__ = 'timeline_entries'
+    user_email = db.Column(db.String(120), db.ForeignKey('users.email'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    author_email = db.Column(db.String(120), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_timeline_entries_post_id', 'post_id'),
+    )
@@ -1,10 +1,12 @@
+from sqlalchemy.orm import validates
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.passwords import password_hasher
 
 class User(db.Model):
     __tablename__ = 'users'
     
     email = db.Column(db.String(120), unique=True, nullable=False, primary_key=True)
+    email_normalized = db.Column(db.String(120), unique=True, index=True, nullable=False)  # Lowercased email for case-insensitive lookups
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     
@@ -15,11 +17,20 @@ class User(db.Model):
         self.username = username
         self.set_password(password)
     
+    @staticmethod
+    def normalize_email(email):
+        return email.strip().lower()
+
+    @validates('email')
+    def _canonicalize_email(self, key, email):
+        self.email_normalized = self.normalize_email(email)
+        return email
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
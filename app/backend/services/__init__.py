@@ -0,0 +1 @@
+# Shared service layer used by the API blueprints
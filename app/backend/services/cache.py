@@ -0,0 +1,234 @@
+"""Pluggable cache shared by the API blueprints.
+
+Values are grouped into namespaces. ``invalidate(namespace)`` bumps a
+namespace version that is visible to every gunicorn worker, so a write in
+one worker drops the cached data in all of them:
+
+- ``memory``: per-process LRU dict; versions live in marker files under
+  ``CACHE_DIR`` (an mtime bump is seen by every worker on the host).
+- ``sqlite``: one SQLite file under ``CACHE_DIR`` shared by all local workers.
+- ``redis``: any Redis-compatible server at ``CACHE_REDIS_URL``.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=1024, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or tempfile.gettempdir()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _version_path(self, namespace):
+        return os.path.join(self.cache_dir, f'prok-cache-{namespace}.version')
+
+    def get_version(self, namespace):
+        try:
+            return os.stat(self._version_path(namespace)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump_version(self, namespace):
+        path = self._version_path(namespace)
+        with open(path, 'a'):
+            pass
+        # Force a strictly newer mtime even on coarse-grained filesystems
+        now = max(time.time_ns(), self.get_version(namespace) + 1)
+        os.utime(path, ns=(now, now))
+
+
+class SQLiteBackend:
+    def __init__(self, max_entries=1024, cache_dir=None):
+        self.max_entries = max_entries
+        self.path = os.path.join(cache_dir or tempfile.gettempdir(), 'prok-cache.sqlite3')
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS versions (namespace TEXT PRIMARY KEY, version INTEGER)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_used_at ON cache (used_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row is None or row[1] < now:
+            return MISSING
+        conn.execute('UPDATE cache SET used_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), now + ttl, now)
+        )
+        # Evict expired entries, then the least recently used beyond the bound
+        conn.execute('DELETE FROM cache WHERE expires_at < ?', (now,))
+        conn.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+    def get_version(self, namespace):
+        row = self._connect().execute('SELECT version FROM versions WHERE namespace = ?', (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, namespace):
+        self._connect().execute(
+            'INSERT INTO versions (namespace, version) VALUES (?, 1) '
+            'ON CONFLICT(namespace) DO UPDATE SET version = version + 1',
+            (namespace,)
+        )
+
+
+class RedisBackend:
+    def __init__(self, url, max_entries=None, cache_dir=None, prefix='prok:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        # LRU bounds are enforced by the server's maxmemory-policy
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return MISSING if value is None else json.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def get_version(self, namespace):
+        return int(self.client.get(f'{self.prefix}version:{namespace}') or 0)
+
+    def bump_version(self, namespace):
+        self.client.incr(f'{self.prefix}version:{namespace}')
+
+
+class Cache:
+    """Namespaced cache with per-key TTL, hit/miss stats and cross-worker invalidation."""
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.default_ttl = 300
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get('CACHE_BACKEND', 'memory')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        cache_dir = app.config.get('CACHE_DIR')
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if name == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'], max_entries, cache_dir)
+        elif name == 'sqlite':
+            self.backend = SQLiteBackend(max_entries, cache_dir)
+        elif name == 'memory':
+            self.backend = MemoryBackend(max_entries, cache_dir)
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND: {name}')
+        app.extensions['cache'] = self
+
+    def _key(self, namespace, key):
+        return f'{namespace}:{self.backend.get_version(namespace)}:{key}'
+
+    def get(self, namespace, key, default=None):
+        value = self.backend.get(self._key(namespace, key))
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, namespace, key, value, ttl=None):
+        self.backend.set(self._key(namespace, key), value, ttl or self.default_ttl)
+
+    def get_or_set(self, namespace, key, loader, ttl=None):
+        """Return the cached value, computing and storing it with ``loader()`` on a miss."""
+        full_key = self._key(namespace, key)
+        value = self.backend.get(full_key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def delete(self, namespace, key):
+        self.backend.delete(self._key(namespace, key))
+
+    def invalidate(self, namespace):
+        """Drop every key in ``namespace`` for all workers sharing the backend."""
+        self.backend.bump_version(namespace)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None
+        }
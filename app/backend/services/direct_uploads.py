@@ -0,0 +1,73 @@
+"""Direct-to-storage uploads.
+
+``issue_upload`` hands the client short-lived signed form fields, and the
+client posts its file straight to storage. The API then only sees the
+stored asset's reference (public id, version and storage's signature).
+``verify_reference`` checks that reference, and the format and size
+storage reports, before a post or avatar may point at it. Media bytes
+never pass through an API worker.
+
+Issued public ids carry an HMAC tag bound to the uploader's email, so
+users cannot claim each other's assets.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+from flask import current_app
+from services.media_storage import get_storage, resource_type_for
+
+# folder, allowed formats and size cap per upload kind; these match the
+# multipart limits in api/posts.py and api/profile.py
+UPLOAD_KINDS = {
+    'post': ('post_media', {'png', 'jpg', 'jpeg', 'mp4', 'webm'}, 20 * 1024 * 1024),
+    'avatar': ('profile_images', {'png', 'jpg', 'jpeg'}, 5 * 1024 * 1024),
+}
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+def _owner_tag(email, name):
+    secret = current_app.config['MEDIA_SIGNING_SECRET']
+    return hmac.new(secret.encode(), f'{email}:{name}'.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def issue_upload(kind, email):
+    """Return the public id plus signed ``{'upload_url', 'fields'}`` per resource type for one direct upload."""
+    folder, formats, max_bytes = UPLOAD_KINDS[kind]
+    name = f'{folder}/{int(time.time())}_{secrets.token_hex(4)}'
+    public_id = f'{name}_{_owner_tag(email, name)}'
+    expires_in = current_app.config.get('MEDIA_UPLOAD_URL_TTL', 600)
+    # Videos have their own Cloudinary endpoint; the client picks with the file's type
+    signed = {
+        resource_type: get_storage().sign_upload(public_id, resource_type, formats, max_bytes, expires_in)
+        for resource_type in sorted({resource_type_for(ext) for ext in formats})
+    }
+    return {'public_id': public_id, 'max_bytes': max_bytes, 'expires_in': expires_in, 'uploads': signed}
+
+
+def verify_reference(kind, email, public_id, version, signature):
+    """Return ``(url, resource_type)`` for a verified asset reference, or raise ``InvalidUpload``.
+
+    The format and size come from storage, not from the client.
+    """
+    folder, formats, max_bytes = UPLOAD_KINDS[kind]
+    if not public_id or not version or not signature:
+        raise InvalidUpload('Incomplete media reference')
+    name, _, tag = public_id.rpartition('_')
+    if not name.startswith(folder + '/') or not hmac.compare_digest(tag, _owner_tag(email, name)):
+        raise InvalidUpload('Media was not issued to this user')
+    storage = get_storage()
+    if not storage.verify_upload(public_id, version, signature):
+        raise InvalidUpload('Invalid media signature')
+    asset = storage.describe(public_id)
+    if asset is None:
+        raise InvalidUpload('Media not found')
+    ext = asset['format'].lower()
+    if ext not in formats or asset['resource_type'] != resource_type_for(ext):
+        raise InvalidUpload('Invalid file type')
+    if asset['bytes'] > max_bytes:
+        raise InvalidUpload('File too large')
+    return storage.url_for(public_id, asset['resource_type'], ext), asset['resource_type']
@@ -0,0 +1,70 @@
+"""Conditional GET helpers (ETag / If-None-Match / Cache-Control).
+
+A single post's validator is its row's ``version`` column. Listings are
+validated by a posts content version stored in the shared cache backend,
+bumped on every write that changes how posts render except view-count
+flushes: those land every few seconds under traffic and would make every
+listing ETag stale. Computing a listing validator needs no query against
+the posts table. The ETags are weak because view counts (and the order of
+``sort=views``) may trail the validator.
+"""
+import hashlib
+import json
+from functools import wraps
+from flask import request, make_response
+from extensions import cache
+
+POSTS_VERSION_NAMESPACE = 'post_content'
+
+
+def posts_version():
+    return cache.backend.get_version(POSTS_VERSION_NAMESPACE)
+
+
+def bump_posts_version():
+    """Call after any write that changes serialized posts (create, delete, like, media status), not view flushes."""
+    cache.invalidate(POSTS_VERSION_NAMESPACE)
+
+
+def make_etag(*parts):
+    """Hash the validator parts plus the request's query string."""
+    args = sorted(request.args.items(multi=True))
+    payload = json.dumps([parts, args], default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _set_validators(response, etag, max_age, public):
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = public
+    response.cache_control.private = not public
+    response.cache_control.max_age = max_age
+    # Revalidate with the ETag once max_age is over
+    response.cache_control.must_revalidate = True
+    if not public:
+        response.vary.add('Authorization')
+    return response
+
+
+def conditional_response(etag, build, max_age=0, public=True):
+    """Return 304 if the client already has ``etag``, else the response from ``build()``.
+
+    ``build`` is only called on a miss, so unchanged data is never queried
+    or serialized again. Non-200 responses are passed through untouched.
+    """
+    if request.if_none_match.contains_weak(etag):
+        return _set_validators(make_response('', 304), etag, max_age, public)
+    response = make_response(build())
+    if response.status_code != 200:
+        return response
+    return _set_validators(response, etag, max_age, public)
+
+
+def conditional(etag_parts, max_age=0, public=True):
+    """Decorator form of conditional_response; ``etag_parts(**view_args)`` returns the validator parts."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = make_etag(*etag_parts(**kwargs))
+            return conditional_response(etag, lambda: view(*args, **kwargs), max_age, public)
+        return wrapper
+    return decorator
@@ -0,0 +1,90 @@
+"""JWT identity loading with a short-lived cache.
+
+``@jwt_required`` resolves the token's user once per request through the
+``user_lookup_loader`` below, and handlers read it as
+``flask_jwt_extended.current_user`` (``flask_jwt_extended`` keeps it on
+``g``, so it is request-scoped). The user and profile columns are cached
+for ``IDENTITY_CACHE_TTL`` seconds in the ``identity`` cache namespace.
+A hit rebuilds both rows as persistent objects in the request's session
+without a query, so handlers can read and modify them as usual. The
+password hash is never cached; it is loaded on first access.
+
+Any committed insert, update or delete of a ``User`` or ``Profile``
+invalidates the namespace for every worker. Bulk updates that bypass the
+ORM call ``invalidate_on_commit`` themselves.
+"""
+from flask import current_app, jsonify
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from extensions import cache, db, jwt
+from models.profile import Profile
+from models.user import User
+
+IDENTITY_NAMESPACE = 'identity'
+USER_FIELDS = ('email', 'username')  # Not password_hash
+
+
+def invalidate_on_commit(session=None):
+    """Drop the cached identities once ``session`` (default: the request's) commits."""
+    (session or db.session).info['identity_changed'] = True
+
+
+def _snapshot(user):
+    profile = user.profile
+    return {
+        'user': {key: getattr(user, key) for key in USER_FIELDS},
+        'profile': {attr.key: getattr(profile, attr.key) for attr in inspect(Profile).column_attrs} if profile else None,
+    }
+
+
+def _detached(model, values):
+    """A detached ``model`` instance carrying ``values`` as its loaded state, built without ``__init__``."""
+    obj = inspect(model).class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def _restore(snapshot):
+    profile = _detached(Profile, snapshot['profile']) if snapshot['profile'] else None
+    user = _detached(User, snapshot['user'])
+    set_committed_value(user, 'profile', profile)
+    return db.session.merge(user, load=False)
+
+
+@jwt.user_lookup_loader
+def load_identity(jwt_header, jwt_data):
+    email = jwt_data[current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]
+    snapshot = cache.get(IDENTITY_NAMESPACE, email)
+    if snapshot is not None:
+        return _restore(snapshot)
+    user = User.query.options(joinedload(User.profile)).filter_by(email=email).first()
+    if user is not None:
+        cache.set(IDENTITY_NAMESPACE, email, _snapshot(user), current_app.config.get('IDENTITY_CACHE_TTL', 30))
+    return user
+
+
+@jwt.user_lookup_error_loader
+def identity_not_found(jwt_header, jwt_data):
+    return jsonify({'msg': 'User not found'}), 404
+
+
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidate_on_commit(session)
+
+
+for _model in (User, Profile):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    # Only once committed, so a concurrent miss cannot re-cache the old rows
+    if session.info.pop('identity_changed', False):
+        cache.invalidate(IDENTITY_NAMESPACE)
+
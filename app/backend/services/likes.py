@@ -0,0 +1,95 @@
+"""Like counting backed by the post_likes ledger.
+
+By default a like atomically runs ``likes = likes + 1`` on the post row.
+With ``LIKE_COUNTER_SHARDS`` > 0, increments go to one of N rows in
+post_like_shards instead, and totals are ``posts.likes + sum(shards)`` on
+read. ``fold_like_shards()`` (the ``flask fold-like-shards`` command)
+periodically moves shard totals back into ``posts.likes``, which is the
+column used for sorting.
+"""
+import random
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.post import Post
+from models.post_like import PostLike, PostLikeShard
+from services.trending import mark_dirty
+
+
+def shard_count():
+    return current_app.config.get('LIKE_COUNTER_SHARDS', 0)
+
+
+def _increment(post_id):
+    shards = shard_count()
+    if not shards:
+        db.session.execute(
+            Post.__table__.update().where(Post.__table__.c.id == post_id)
+            .values(likes=func.coalesce(Post.__table__.c.likes, 0) + 1, version=Post.__table__.c.version + 1)
+        )
+        return
+    table = PostLikeShard.__table__
+    shard = random.randrange(shards)
+    condition = (table.c.post_id == post_id, table.c.shard == shard)
+    result = db.session.execute(table.update().where(*condition).values(count=table.c.count + 1))
+    if result.rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(post_id=post_id, shard=shard, count=1))
+    except IntegrityError:
+        db.session.execute(table.update().where(*condition).values(count=table.c.count + 1))
+
+
+def add_like(post_id, user_email):
+    """Record a like; returns False if this user already liked the post."""
+    try:
+        with db.session.begin_nested():
+            db.session.add(PostLike(post_id=post_id, user_email=user_email))
+    except IntegrityError:
+        return False
+    _increment(post_id)
+    mark_dirty([post_id])
+    db.session.commit()
+    return True
+
+
+def like_totals(post_ids):
+    """{post_id: likes} including unfolded shard increments, in one query each."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    totals = dict(db.session.query(Post.id, func.coalesce(Post.likes, 0)).filter(Post.id.in_(post_ids)).all())
+    if shard_count():
+        rows = db.session.query(PostLikeShard.post_id, func.sum(PostLikeShard.count)).filter(
+            PostLikeShard.post_id.in_(post_ids)
+        ).group_by(PostLikeShard.post_id).all()
+        for post_id, count in rows:
+            totals[post_id] = totals.get(post_id, 0) + int(count or 0)
+    return totals
+
+
+def delete_likes(post_id):
+    PostLikeShard.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+    PostLike.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+
+
+def fold_like_shards():
+    """Move shard counts into posts.likes; safe to run while likes keep arriving."""
+    table = PostLikeShard.__table__
+    rows = db.session.query(PostLikeShard.post_id, PostLikeShard.shard, PostLikeShard.count).filter(
+        PostLikeShard.count > 0
+    ).all()
+    for post_id, shard, count in rows:
+        # Subtract exactly what was read so concurrent increments are kept
+        db.session.execute(table.update().where(
+            table.c.post_id == post_id, table.c.shard == shard
+        ).values(count=table.c.count - count))
+        db.session.execute(
+            Post.__table__.update().where(Post.__table__.c.id == post_id)
+            .values(likes=func.coalesce(Post.__table__.c.likes, 0) + count, version=Post.__table__.c.version + 1)
+        )
+    mark_dirty({post_id for post_id, shard, count in rows})
+    db.session.commit()
+    return len(rows)
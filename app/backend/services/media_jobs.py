@@ -0,0 +1,209 @@
+"""Background media upload pipeline.
+
+Request handlers only spool the file to local disk and record a
+``MediaJob``. A per-worker thread pool then uploads it to storage and
+patches the post's ``media_url`` / ``media_type`` / ``media_status`` (or
+the profile avatar). Request latency no longer depends on upload time.
+Images also get resized WebP/AVIF variants (see ``services.media_variants``)
+stored next to the original.
+``MEDIA_UPLOAD_WORKERS=0`` runs jobs inline, which tests use.
+
+Jobs still pending after ``MEDIA_JOB_STALE_SECONDS`` (their worker died)
+are picked up again by ``recover``, which each worker runs when it starts
+and ``flask recover-media-jobs`` runs on demand.
+"""
+import json
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import inspect
+from extensions import db
+from models.media_asset import MediaAsset
+from models.media_job import MediaJob
+from models.post import Post
+from models.profile import Profile
+from services.http_cache import bump_posts_version
+from services.identity import invalidate_on_commit
+from services.media_storage import get_storage
+from services import media_variants
+
+
+class MediaPipeline:
+    def __init__(self):
+        self.app = None
+        self.workers = 2
+        self.variant_workers = 2
+        self.max_pixels = 40_000_000
+        self.spool_dir = None
+        self.stale_seconds = 900
+        self._executor = None
+        self._executor_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('MEDIA_UPLOAD_WORKERS', 2)
+        self.variant_workers = app.config.get('MEDIA_VARIANT_WORKERS', 2)
+        self.max_pixels = app.config.get('MEDIA_MAX_IMAGE_PIXELS', 40_000_000)
+        self.stale_seconds = app.config.get('MEDIA_JOB_STALE_SECONDS', 900)
+        self.spool_dir = app.config.get('MEDIA_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'prok-media-spool')
+        os.makedirs(self.spool_dir, exist_ok=True)
+        app.extensions['media_pipeline'] = self
+
+    def spool(self, file, ext):
+        """Save an uploaded file to the local spool directory and return its path."""
+        path = os.path.join(self.spool_dir, f'{uuid.uuid4().hex}.{ext}')
+        file.save(path)
+        return path
+
+    def discard(self, job):
+        """After a rollback, delete the spool file of a job that was never committed."""
+        if job is None or inspect(job).persistent:
+            return
+        if job.spool_path and os.path.exists(job.spool_path):
+            os.remove(job.spool_path)
+
+    def create_job(self, owner_email, kind, public_id, resource_type, ext, spool_path):
+        """Add a pending job to the session; the caller commits, then calls ``enqueue``."""
+        job = MediaJob(
+            id=str(uuid.uuid4()), owner_email=owner_email, kind=kind,
+            public_id=public_id, resource_type=resource_type, ext=ext, spool_path=spool_path,
+            url=get_storage().url_for(public_id, resource_type, ext)
+        )
+        db.session.add(job)
+        return job
+
+    def enqueue(self, job_id):
+        if not self.workers:
+            self.run(job_id)
+            return
+        self._get_executor().submit(self.run, job_id)
+
+    def _get_executor(self):
+        # Created lazily so each forked gunicorn worker owns its pool
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='media-upload')
+            self._executor_pid = pid
+        return self._executor
+
+    def start(self):
+        if self.variant_workers:
+            media_variants.start(self.variant_workers)
+        if self.app is not None:
+            with self.app.app_context():
+                # Pooled connections were opened in the gunicorn master; never share them
+                db.engine.dispose(close=False)
+            try:
+                self.recover()
+            except Exception as e:
+                print(f"Media job recovery failed: {e}")
+
+    def recover(self):
+        """Re-enqueue jobs left pending by a dead worker; returns how many were picked up."""
+        with self.app.app_context():
+            cutoff = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+            stale = [job_id for job_id, in db.session.query(MediaJob.id).filter(
+                MediaJob.status == 'pending', MediaJob.updated_at < cutoff
+            )]
+            claimed = []
+            for job_id in stale:
+                # Touching updated_at claims the job, so concurrent workers never both take it
+                if MediaJob.query.filter(
+                    MediaJob.id == job_id, MediaJob.status == 'pending', MediaJob.updated_at < cutoff
+                ).update({'updated_at': datetime.utcnow()}, synchronize_session=False):
+                    claimed.append(job_id)
+            db.session.commit()
+        for job_id in claimed:
+            self.enqueue(job_id)
+        return len(claimed)
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        media_variants.shutdown()
+
+    def run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(MediaJob, job_id)
+            if job is None or job.status != 'pending':
+                return
+            provisional_url = job.url
+            storage = get_storage()
+            try:
+                if not job.spool_path or not os.path.exists(job.spool_path):
+                    raise RuntimeError('Spooled file is gone')
+                result = storage.upload(job.spool_path, job.public_id, job.resource_type, job.ext)
+                if not result.get('url'):
+                    raise RuntimeError('Storage returned no URL')
+                job.url = result['url']
+                job.status = 'done'
+                variants = self._upload_variants(job, storage) if job.resource_type == 'image' else {}
+                self._apply(job, provisional_url, result.get('resource_type', job.resource_type), 'ready', variants)
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(MediaJob, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                self._apply(job, provisional_url, job.resource_type, 'failed', {})
+                print(f"Media upload job {job_id} failed: {e}")
+            db.session.commit()
+            bump_posts_version()
+            if job.spool_path and os.path.exists(job.spool_path):
+                os.remove(job.spool_path)
+
+    def _upload_variants(self, job, storage):
+        """Render and store the job's image variants; return ``{name: {format: url}}``.
+
+        A failure here leaves the original usable, so it is logged, not raised.
+        """
+        try:
+            rendered = media_variants.generate_variants(job.spool_path, job.kind, self.variant_workers, self.max_pixels)
+        except Exception as e:
+            self._variants_failed(job, e)
+            return {}
+        urls = {}
+        try:
+            for name, files in rendered.items():
+                urls[name] = {}
+                for fmt, path in files.items():
+                    urls[name][fmt] = storage.upload(path, f'{job.public_id}_{name}_{fmt}', 'image', fmt)['url']
+        except Exception as e:
+            self._variants_failed(job, e)
+            urls = {}
+        finally:
+            for files in rendered.values():
+                for path in files.values():
+                    if os.path.exists(path):
+                        os.remove(path)
+        return urls
+
+    def _variants_failed(self, job, error):
+        # Kept on the job (GET /api/media/jobs/<id>) as well as logged
+        job.error = f'Variants failed: {error!r}'
+        self.app.logger.exception(f"Media variants for job {job.id} failed")
+
+    def _apply(self, job, provisional_url, resource_type, status, variants):
+        """Patch the asset and every post or profile still pointing at its provisional URL."""
+        asset_values = {'status': status}
+        if status == 'ready':
+            asset_values.update(url=job.url, variants=json.dumps(variants) if variants else None)
+        MediaAsset.query.filter_by(public_id=job.public_id).update(asset_values, synchronize_session=False)
+        if job.kind == 'post':
+            table = Post.__table__
+            values = {'media_status': status, 'version': table.c.version + 1}
+            if status == 'ready':
+                values.update(media_url=job.url, media_type=resource_type,
+                              media_variants=json.dumps(variants) if variants else None)
+            # Deduplicated uploads share the asset's URL across posts
+            db.session.execute(table.update().where(table.c.media_url == provisional_url).values(**values))
+        elif job.kind == 'avatar' and status == 'ready':
+            Profile.query.filter_by(avatar=provisional_url).update(
+                {'avatar': job.url, 'avatar_variants': json.dumps(variants) if variants else None},
+                synchronize_session=False
+            )
+            invalidate_on_commit()
+
+media_pipeline = MediaPipeline()
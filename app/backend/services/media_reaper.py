@@ -0,0 +1,176 @@
+"""Media lifecycle: queued batch deletes and a reconciliation sweep.
+
+Request paths never call storage to delete anything. ``queue_delete``
+records the files in ``media_deletions`` as part of the request's
+transaction. The reaper drains that queue in the background, every
+``MEDIA_REAP_INTERVAL`` seconds per worker (or via ``flask reap-media``),
+and deletes through each backend's bulk API. Failed deletes stay queued
+and are retried.
+
+``sweep`` is run periodically by ``cleanup_uploads.py``. It recounts
+asset references from ``posts.media_url`` and ``profiles.avatar``. It
+releases assets nothing points at, and queues stored files that no row
+references. Anything younger than ``MEDIA_SWEEP_GRACE_SECONDS`` is left
+alone, so in-flight uploads are never reaped.
+"""
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from extensions import db
+from models.media_asset import MediaAsset
+from models.media_deletion import MediaDeletion
+from models.media_job import MediaJob
+from models.post import Post
+from models.profile import Profile
+from services.media_storage import get_storage
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+SWEEP_FOLDERS = ('post_media', 'profile_images')
+
+
+def queue_delete(files):
+    """Queue ``(public_id, resource_type)`` pairs for deletion in the current transaction."""
+    db.session.add_all([MediaDeletion(public_id=public_id, resource_type=resource_type) for public_id, resource_type in files])
+    media_reaper.poke()
+
+
+def queue_url(url):
+    """Queue the stored file behind a media URL; returns False for URLs the storage does not own."""
+    located = get_storage().locate(url)
+    if located is None:
+        return False
+    queue_delete([located])
+    return True
+
+
+class MediaReaper:
+    def __init__(self):
+        self.app = None
+        self.interval = 60
+        self._timer_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('MEDIA_REAP_INTERVAL', 60)
+        app.extensions['media_reaper'] = self
+
+    def poke(self):
+        # Started lazily so each forked gunicorn worker gets its own reaper
+        pid = os.getpid()
+        if self.app is None or not self.interval or self._timer_pid == pid:
+            return
+        self._timer_pid = pid
+        self._schedule()
+
+    def _schedule(self):
+        timer = threading.Timer(self.interval, self._tick)
+        timer.daemon = True
+        timer.start()
+
+    def _tick(self):
+        try:
+            with self.app.app_context():
+                self.reap()
+        except Exception as e:
+            print(f"Media reaper failed: {e}")
+        self._schedule()
+
+    def reap(self, limit=1000):
+        """Delete up to ``limit`` queued files in bulk batches; returns how many were deleted."""
+        storage = get_storage()
+        deleted = 0
+        failed = False
+        while deleted < limit and not failed:
+            rows = MediaDeletion.query.filter(MediaDeletion.attempts < MAX_ATTEMPTS).order_by(
+                MediaDeletion.id
+            ).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            claimed = self._claim(rows)
+            if not claimed:
+                continue
+            by_type = defaultdict(list)
+            for row in claimed:
+                by_type[row['resource_type']].append(row)
+            for resource_type, batch in by_type.items():
+                try:
+                    storage.destroy_many([row['public_id'] for row in batch], resource_type)
+                    deleted += len(batch)
+                except Exception as e:
+                    # Put the batch back for a later retry
+                    db.session.add_all([MediaDeletion(
+                        public_id=row['public_id'], resource_type=resource_type, queued_at=row['queued_at'],
+                        attempts=row['attempts'] + 1, last_error=str(e)
+                    ) for row in batch])
+                    db.session.commit()
+                    failed = True
+                    print(f"Media delete batch failed: {e}")
+        return deleted
+
+    def _claim(self, rows):
+        """Delete the queue rows first, so concurrent reapers never destroy the same batch twice."""
+        claimed = []
+        for row in rows:
+            data = {'public_id': row.public_id, 'resource_type': row.resource_type,
+                    'queued_at': row.queued_at, 'attempts': row.attempts}
+            if MediaDeletion.query.filter_by(id=row.id).delete(synchronize_session=False):
+                claimed.append(data)
+        db.session.commit()
+        return claimed
+
+    def sweep(self, grace_seconds=None, dry_run=False):
+        """Reconcile assets and stored files with the rows that use them; returns ``(released, orphaned)``."""
+        from services.media_store import stored_files
+        if grace_seconds is None:
+            grace_seconds = self.app.config.get('MEDIA_SWEEP_GRACE_SECONDS', 86400)
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        storage = get_storage()
+        usage = defaultdict(int)
+        for url, count in db.session.query(Post.media_url, func.count()).filter(
+            Post.media_url.isnot(None)
+        ).group_by(Post.media_url):
+            usage[url] += count
+        for url, count in db.session.query(Profile.avatar, func.count()).filter(
+            Profile.avatar.isnot(None)
+        ).group_by(Profile.avatar):
+            usage[url] += count
+
+        # Fix drifted refcounts and release assets nothing points at any more
+        referenced = set()
+        released = 0
+        for asset in MediaAsset.query.all():
+            refs = usage.get(asset.url, 0)
+            if refs == 0 and asset.created_at and asset.created_at < cutoff:
+                released += 1
+                if not dry_run:
+                    queue_delete(stored_files(asset))
+                    db.session.delete(asset)
+                continue
+            if asset.refcount != refs and not dry_run:
+                asset.refcount = refs
+            referenced.update(public_id for public_id, _ in stored_files(asset))
+        for url in usage:
+            located = storage.locate(url)
+            if located:
+                referenced.add(located[0])
+        referenced.update(public_id for public_id, in db.session.query(MediaJob.public_id).filter_by(status='pending'))
+        referenced.update(public_id for public_id, in db.session.query(MediaDeletion.public_id))
+
+        # Stored files that no row references
+        orphaned = 0
+        for folder in SWEEP_FOLDERS:
+            for public_id, resource_type, created_at in storage.list_assets(folder):
+                if public_id in referenced or created_at >= cutoff:
+                    continue
+                orphaned += 1
+                if not dry_run:
+                    queue_delete([(public_id, resource_type)])
+        if not dry_run:
+            db.session.commit()
+        return released, orphaned
+
+
+media_reaper = MediaReaper()
@@ -0,0 +1,206 @@
+"""Media storage backends.
+
+``cloudinary`` (default) uploads to Cloudinary. ``local`` writes under
+``MEDIA_LOCAL_ROOT`` (the repo's ``uploads/`` directory) and serves the
+files from ``/uploads/``; it is the stand-in used for local development and
+tests. Both build an asset's final URL from its public id before the bytes
+are uploaded, so a post can point at its media while the upload is still
+pending.
+
+Both also support direct uploads: ``sign_upload`` issues short-lived signed
+form fields the client posts straight to storage, ``verify_upload``
+checks the signature storage returns with the stored asset, and
+``describe`` reports the stored asset's real format and size. For ``local``
+the receiving end is ``fake_storage_server.py``.
+"""
+import hashlib
+import hmac
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import current_app
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+
+CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME', 'dmspcref3')
+CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY', '761459965218136')
+CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET', 'G6YHFTGxFXRC2Sh7bjZANBkeZZ4')
+
+cloudinary.config(
+    cloud_name=CLOUDINARY_CLOUD_NAME,
+    api_key=CLOUDINARY_API_KEY,
+    api_secret=CLOUDINARY_API_SECRET
+)
+
+VIDEO_EXTENSIONS = {'mp4', 'webm', 'avi', 'mov'}
+# Cloudinary's bulk delete and listing APIs take at most this many ids per call
+BULK_LIMIT = 100
+INSECURE_SECRETS = {None, '', 'dev'}  # config.py's fallbacks
+CLOUDINARY_URL_PATTERN = re.compile(r'^https?://res\.cloudinary\.com/[^/]+/(image|video|raw)/upload/(?:v\d+/)?(.+?)(?:\.\w+)?$')
+
+
+def resource_type_for(ext):
+    return 'video' if ext in VIDEO_EXTENSIONS else 'image'
+
+
+class CloudinaryStorage:
+    def url_for(self, public_id, resource_type, ext):
+        url, _ = cloudinary.utils.cloudinary_url(public_id, resource_type=resource_type, format=ext, secure=True)
+        return url
+
+    def upload(self, path, public_id, resource_type, ext):
+        result = cloudinary.uploader.upload(path, public_id=public_id, overwrite=True, resource_type=resource_type)
+        return {
+            'url': result.get('secure_url'),
+            'resource_type': result.get('resource_type', resource_type)
+        }
+
+    def destroy(self, public_id, resource_type):
+        cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+
+    def destroy_many(self, public_ids, resource_type):
+        for start in range(0, len(public_ids), BULK_LIMIT):
+            cloudinary.api.delete_resources(public_ids[start:start + BULK_LIMIT], resource_type=resource_type)
+
+    def locate(self, url):
+        """``(public_id, resource_type)`` of a delivery URL, or None if it is not ours."""
+        match = CLOUDINARY_URL_PATTERN.match(url or '')
+        return (match.group(2), match.group(1)) if match else None
+
+    def list_assets(self, folder):
+        """Yield ``(public_id, resource_type, created_at)`` for everything stored under ``folder``."""
+        for resource_type in ('image', 'video'):
+            cursor = None
+            while True:
+                page = cloudinary.api.resources(
+                    type='upload', prefix=f'{folder}/', resource_type=resource_type, max_results=500, next_cursor=cursor
+                )
+                for resource in page.get('resources', []):
+                    created_at = datetime.strptime(resource['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+                    yield resource['public_id'], resource_type, created_at
+                cursor = page.get('next_cursor')
+                if not cursor:
+                    break
+
+    def sign_upload(self, public_id, resource_type, formats, max_bytes, expires_in):
+        # Cloudinary rejects signed requests whose timestamp is over an hour old
+        # The upload API has no size cap of its own; the signed context records
+        # the cap with the asset, and verify_reference checks the stored size
+        params = {
+            'timestamp': int(time.time()), 'public_id': public_id, 'allowed_formats': ','.join(sorted(formats)),
+            'context': f'max_bytes={max_bytes}'
+        }
+        config = cloudinary.config()
+        params['signature'] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params['api_key'] = config.api_key
+        return {'upload_url': cloudinary.utils.cloudinary_api_url('upload', resource_type=resource_type), 'fields': params}
+
+    def verify_upload(self, public_id, version, signature):
+        return cloudinary.utils.verify_api_response_signature(public_id, version, signature)
+
+    def describe(self, public_id):
+        """``{'format', 'resource_type', 'bytes'}`` of a stored asset as Cloudinary reports it, or None."""
+        for resource_type in ('image', 'video'):
+            try:
+                resource = cloudinary.api.resource(public_id, resource_type=resource_type)
+            except cloudinary.exceptions.NotFound:
+                continue
+            return {'format': resource['format'], 'resource_type': resource_type, 'bytes': resource['bytes']}
+        return None
+
+
+def sign_params(secret, params):
+    """HMAC-SHA256 over the sorted, url-encoded params (the local stand-in for Cloudinary's signatures)."""
+    message = urlencode(sorted((key, str(value)) for key, value in params.items()))
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def check_signing_secret(app):
+    """Refuse to sign local uploads with the guessable default ``MEDIA_SIGNING_SECRET`` outside debug and testing."""
+    if app.config.get('MEDIA_SIGNING_SECRET') in INSECURE_SECRETS and not (app.debug or app.testing):
+        raise RuntimeError('MEDIA_SIGNING_SECRET (or SECRET_KEY) must be set to a random value')
+
+
+class LocalStorage:
+    def __init__(self, root, base_url='/uploads', secret=''):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.secret = secret
+
+    def _path(self, public_id, ext):
+        return os.path.join(self.root, *f'{public_id}.{ext}'.split('/'))
+
+    def url_for(self, public_id, resource_type, ext):
+        return f'{self.base_url}/{public_id}.{ext}'
+
+    def upload(self, path, public_id, resource_type, ext):
+        target = self._path(public_id, ext)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+        return {'url': self.url_for(public_id, resource_type, ext), 'resource_type': resource_type}
+
+    def _stored_files(self, public_id):
+        """Paths of the files stored under ``public_id``, whatever their extension."""
+        folder, _, name = public_id.rpartition('/')
+        directory = os.path.join(self.root, *folder.split('/')) if folder else self.root
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, filename) for filename in os.listdir(directory)
+                if filename.rsplit('.', 1)[0] == name]
+
+    def destroy(self, public_id, resource_type):
+        for path in self._stored_files(public_id):
+            os.remove(path)
+
+    def destroy_many(self, public_ids, resource_type):
+        for public_id in public_ids:
+            self.destroy(public_id, resource_type)
+
+    def locate(self, url):
+        if not url or not url.startswith(self.base_url + '/'):
+            return None
+        public_id, _, ext = url[len(self.base_url) + 1:].rpartition('.')
+        return (public_id, resource_type_for(ext)) if public_id else None
+
+    def list_assets(self, folder):
+        directory = os.path.join(self.root, *folder.split('/'))
+        if not os.path.isdir(directory):
+            return
+        for filename in os.listdir(directory):
+            name, _, ext = filename.rpartition('.')
+            path = os.path.join(directory, filename)
+            if name and os.path.isfile(path):
+                yield f'{folder}/{name}', resource_type_for(ext), datetime.utcfromtimestamp(os.path.getmtime(path))
+
+    def sign_upload(self, public_id, resource_type, formats, max_bytes, expires_in):
+        params = {
+            'public_id': public_id, 'resource_type': resource_type, 'allowed_formats': ','.join(sorted(formats)),
+            'max_bytes': max_bytes, 'expires': int(time.time()) + expires_in
+        }
+        params['signature'] = sign_params(self.secret, params)
+        return {'upload_url': f'{self.base_url}/upload', 'fields': params}
+
+    def verify_upload(self, public_id, version, signature):
+        expected = sign_params(self.secret, {'public_id': public_id, 'version': version})
+        return hmac.compare_digest(expected, str(signature))
+
+    def describe(self, public_id):
+        for path in self._stored_files(public_id):
+            ext = path.rsplit('.', 1)[1].lower()
+            return {'format': ext, 'resource_type': resource_type_for(ext), 'bytes': os.path.getsize(path)}
+        return None
+
+
+def get_storage():
+    if current_app.config.get('MEDIA_STORAGE', 'cloudinary') == 'local':
+        return LocalStorage(
+            current_app.config['MEDIA_LOCAL_ROOT'], current_app.config.get('MEDIA_LOCAL_BASE_URL', '/uploads'),
+            current_app.config['MEDIA_SIGNING_SECRET']
+        )
+    return CloudinaryStorage()
@@ -0,0 +1,92 @@
+"""Content-addressed, reference-counted media store.
+
+Uploads are hashed while they stream in (``UploadSpool``). The digest
+becomes the public id (``post_media/<sha256>``), so an identical file
+uploaded again, like a reposted meme or a re-uploaded avatar, reuses the
+stored asset instead of being spooled and uploaded a second time. Each
+post or avatar that points at an asset holds one reference; ``release``
+drops it, and the last one queues the stored files for the media reaper.
+
+The bytes live in whichever ``services.media_storage`` backend is
+configured: Cloudinary, or local files under ``uploads/``.
+"""
+import json
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.media_asset import MediaAsset
+from models.media_deletion import MediaDeletion
+from services.media_jobs import media_pipeline
+from services.media_reaper import queue_delete, queue_url
+from services.media_storage import get_storage, resource_type_for
+
+UPLOAD_FOLDERS = {'post': 'post_media', 'avatar': 'profile_images'}
+
+
+def store_upload(file, kind, owner_email):
+    """Reference the asset for an uploaded file, creating it if it is new.
+
+    ``file`` must have been streamed through ``limit_upload``, which hashes
+    and sniffs it. Returns ``(asset, job)``; ``job`` is None when the
+    content is already stored or on its way. The caller commits, then
+    calls ``media_pipeline.enqueue(job.id)``.
+    """
+    digest = file.stream.digest
+    ext = file.stream.sniffed
+    public_id = f'{UPLOAD_FOLDERS[kind]}/{digest}'
+    asset = MediaAsset.query.filter_by(digest=digest, kind=kind).first()
+    created = False
+    if asset is None:
+        resource_type = resource_type_for(ext)
+        try:
+            with db.session.begin_nested():
+                asset = MediaAsset(
+                    digest=digest, kind=kind, public_id=public_id, resource_type=resource_type, ext=ext,
+                    url=get_storage().url_for(public_id, resource_type, ext), size=file.stream.received,
+                    status='pending', refcount=0
+                )
+                db.session.add(asset)
+                # The same content may have been released and still be queued for deletion
+                MediaDeletion.query.filter(MediaDeletion.public_id.startswith(public_id)).delete(synchronize_session=False)
+            created = True
+        except IntegrityError:
+            # A concurrent request stored the same content first
+            asset = MediaAsset.query.filter_by(digest=digest, kind=kind).one()
+    MediaAsset.query.filter_by(id=asset.id).update({'refcount': MediaAsset.refcount + 1}, synchronize_session=False)
+    job = None
+    if created or asset.status == 'failed':
+        # New content, or a previous upload of it failed
+        asset.status = 'pending'
+        spool_path = media_pipeline.spool(file, asset.ext)
+        job = media_pipeline.create_job(owner_email, kind, asset.public_id, asset.resource_type, asset.ext, spool_path)
+    return asset, job
+
+
+def variants_of(asset):
+    return json.loads(asset.variants) if asset.variants else {}
+
+
+def stored_files(asset):
+    """``(public_id, resource_type)`` of the original and every variant of an asset."""
+    files = [(asset.public_id, asset.resource_type)]
+    for name, formats in variants_of(asset).items():
+        files.extend((f'{asset.public_id}_{name}_{fmt}', 'image') for fmt in formats)
+    return files
+
+
+def release(url):
+    """Drop one reference to the media at ``url``, queueing its files for deletion with the last one.
+
+    Media stored before the content-addressed store has a single owner, so
+    its file is queued straight away.
+    """
+    if not url:
+        return
+    asset = MediaAsset.query.filter_by(url=url).first()
+    if asset is None:
+        queue_url(url)
+        return
+    MediaAsset.query.filter_by(id=asset.id).update({'refcount': MediaAsset.refcount - 1}, synchronize_session=False)
+    db.session.refresh(asset)
+    if asset.refcount <= 0:
+        queue_delete(stored_files(asset))
+        db.session.delete(asset)
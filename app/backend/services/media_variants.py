@@ -0,0 +1,126 @@
+"""Resized WebP (and AVIF, where Pillow supports it) variants of uploaded images.
+
+The media pipeline calls ``generate_variants`` for each image job before
+uploading it. The original is decoded once in a ``ProcessPoolExecutor``,
+so CPU-bound resizing stays off the request and upload threads. Every
+variant is then saved and stored next to the original. Images above
+``MEDIA_MAX_IMAGE_PIXELS`` are refused, both at upload time
+(``check_image_pixels`` reads the header and checks the file's structure)
+and before decoding. Files Pillow cannot parse are refused at upload time
+too, as ``InvalidImage``.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+# name -> longest side in pixels, per upload kind
+VARIANT_SIZES = {
+    'post': {'thumb': 320, 'medium': 960},
+    'avatar': {'small': 64, 'medium': 256},
+}
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+_executor = None
+_executor_pid = None
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class ImageTooLarge(InvalidImage):
+    pass
+
+
+def variant_formats():
+    return ['webp', 'avif'] if features.check('avif') else ['webp']
+
+
+def check_image_pixels(stream, max_pixels):
+    """Raise ``ImageTooLarge`` if an image's header declares more than ``max_pixels``,
+    ``InvalidImage`` if the file is truncated or not an image Pillow can read.
+    """
+    position = stream.tell()
+    try:
+        with Image.open(stream) as image:
+            width, height = image.size
+            # Walks the file's chunks/markers without decoding pixels
+            image.verify()
+    except Image.DecompressionBombError:
+        raise ImageTooLarge('Image dimensions too large')
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        # Truncated or corrupt files; UnidentifiedImageError is an OSError too
+        raise InvalidImage('Invalid image')
+    finally:
+        stream.seek(position)
+    if width * height > max_pixels:
+        raise ImageTooLarge('Image dimensions too large')
+
+
+def render_variants(path, sizes, formats, max_pixels):
+    """Decode ``path`` once and write each size/format next to it; return ``{name: {format: path}}``.
+
+    Runs in a worker process.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    base = path.rsplit('.', 1)[0]
+    variants = {}
+    with Image.open(path) as image:
+        if image.width * image.height > max_pixels:
+            raise ImageTooLarge('Image dimensions too large')
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        for name, size in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            variants[name] = {}
+            for fmt in formats:
+                target = f'{base}_{name}.{fmt}'
+                quality = WEBP_QUALITY if fmt == 'webp' else AVIF_QUALITY
+                resized.save(target, fmt.upper(), quality=quality)
+                variants[name][fmt] = target
+    return variants
+
+
+def _get_executor(workers):
+    global _executor, _executor_pid
+    # One pool per gunicorn worker. Forked, because spawned children would
+    # re-import the main module (and build a whole app) just to resize images
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def start(workers):
+    """Fork the pool's processes now, while the calling worker is still single-threaded."""
+    executor = _get_executor(workers)
+    for _ in range(workers):
+        executor.submit(int)
+
+
+def generate_variants(path, kind, workers, max_pixels):
+    """Render the variants for an upload of ``kind``; ``workers=0`` renders in-process."""
+    global _executor
+    args = (path, VARIANT_SIZES[kind], variant_formats(), max_pixels)
+    if not workers:
+        return render_variants(*args)
+    executor = _get_executor(workers)
+    try:
+        return executor.submit(render_variants, *args).result()
+    except BrokenProcessPool:
+        # A child died (e.g. OOM-killed); the pool is unusable, so the next job forks a new one
+        if _executor is executor:
+            _executor = None
+        executor.shutdown(wait=False)
+        raise
+
+
+def shutdown():
+    global _executor
+    if _executor is not None and _executor_pid == os.getpid():
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,149 @@
+import base64
+import json
+import math
+from datetime import datetime
+from flask import jsonify, request
+from sqlalchemy import and_, or_, desc, func, text
+from extensions import db, cache
+from models.post import Post
+from services.post_serializer import posts_response, render_posts
+
+# Sort keys supported by keyset pagination; Post.id is always the tie-breaker.
+# All are NOT NULL, so ``column < value`` reaches every row and cursors never hold null
+SORT_COLUMNS = {
+    'created_at': Post.created_at,
+    'likes': Post.likes,
+    'views': Post.views,
+}
+
+
+# Cached COUNT(*) results per filter combination; invalidated on post create/delete
+TOTALS_NAMESPACE = 'post_totals'
+TOTALS_CACHE_TTL = 30
+
+# Query parameters that do not change which rows match
+NON_FILTER_ARGS = {'page', 'per_page', 'sort', 'cursor', 'with_total'}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, value, post_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, post_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    if cursor_sort != sort or not isinstance(post_id, int):
+        raise InvalidCursor('Cursor does not match the requested sort')
+    if value is None:
+        raise InvalidCursor('Malformed cursor')
+    if sort == 'created_at':
+        try:
+            value = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            raise InvalidCursor('Malformed cursor')
+    return value, post_id
+
+
+def order_posts(query, sort):
+    """Apply the stable (sort column, id) ordering used by both pagination modes."""
+    column = SORT_COLUMNS.get(sort, Post.created_at)
+    return query.order_by(desc(column), desc(Post.id))
+
+
+def keyset_page(query, sort, cursor, per_page):
+    """Fetch one page after ``cursor`` without OFFSET or COUNT(*).
+
+    Returns ``(posts, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    if sort not in SORT_COLUMNS:
+        sort = 'created_at'
+    column = SORT_COLUMNS[sort]
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        query = query.filter(or_(
+            column < value,
+            and_(column == value, Post.id < last_id)
+        ))
+    rows = order_posts(query, sort).limit(per_page + 1).all()
+    posts = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = posts[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), last.id)
+    return posts, next_cursor
+
+
+def cursor_page_response(query, sort, cursor, per_page):
+    """JSON response for cursor mode; an empty ``cursor`` requests the first page."""
+    if sort not in SORT_COLUMNS:
+        # Relevance and trending order by computed scores, which a (column, id) keyset can't resume
+        return jsonify({'msg': f"Cursor pagination supports sort={', '.join(SORT_COLUMNS)}"}), 400
+    try:
+        posts, next_cursor = keyset_page(query, sort, cursor, per_page)
+    except InvalidCursor:
+        return jsonify({'msg': 'Invalid cursor'}), 400
+    return posts_response(render_posts(posts), pagination={
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }), 200
+
+
+def _estimated_total(query):
+    """Row estimate from the PostgreSQL planner; no rows are counted."""
+    statement = query.order_by(None).statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    plan = db.session.execute(text(f'EXPLAIN (FORMAT JSON) {statement}')).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _total(query, mode):
+    filters = sorted((k, v) for k, v in request.args.items(multi=True) if k not in NON_FILTER_ARGS)
+    key = json.dumps([request.endpoint, mode, filters])
+    if mode == 'estimate' and db.engine.dialect.name == 'postgresql':
+        return cache.get_or_set(TOTALS_NAMESPACE, key, lambda: _estimated_total(query), TOTALS_CACHE_TTL), True
+    count = db.session.query(func.count()).select_from(query.order_by(None).subquery())
+    return cache.get_or_set(TOTALS_NAMESPACE, key, count.scalar, TOTALS_CACHE_TTL), False
+
+
+def offset_page(query, page, per_page):
+    """Fetch an offset page and its pagination block.
+
+    ``has_next`` comes from fetching ``per_page + 1`` rows. ``?with_total=false``
+    skips counting entirely; ``?with_total=estimate`` uses planner statistics
+    on PostgreSQL. Exact totals are cached per filter combination for a
+    short TTL.
+    """
+    page = max(page, 1)
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    pagination = {
+        'page': page,
+        'per_page': per_page,
+        'total': None,
+        'pages': None,
+        'has_next': len(rows) > per_page,
+        'has_prev': page > 1
+    }
+    mode = request.args.get('with_total', 'true').lower()
+    if mode not in ('false', '0', 'no'):
+        total, estimated = _total(query, mode)
+        pagination['total'] = total
+        pagination['pages'] = math.ceil(total / per_page) if total else 0
+        if estimated:
+            pagination['total_estimated'] = True
+    return rows[:per_page], pagination
+
+
+def invalidate_totals():
+    cache.invalidate(TOTALS_NAMESPACE)
@@ -0,0 +1,64 @@
+"""Password hashing on a bounded thread pool.
+
+Hashes use Werkzeug's formats. ``PASSWORD_HASH_METHOD`` picks the
+algorithm and cost, e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``.
+hashlib's scrypt and PBKDF2 release the GIL, so
+``PASSWORD_HASH_WORKERS`` threads give real parallelism. They also cap
+how many hashes a worker runs at once, so a login burst queues for the
+pool instead of taking every CPU from the other endpoints.
+
+``needs_rehash`` reports hashes made with other parameters. Login uses it
+to upgrade them transparently.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = 2
+        self._dummy_hash = None
+        self._executor = None
+        self._executor_pid = None
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self._dummy_hash = generate_password_hash('', self.method)
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        # Created lazily so each forked gunicorn worker owns its pool
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            self._executor_pid = pid
+        return self._executor.submit(fn, *args).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password; with no hash (unknown user) it still pays the hashing cost and fails."""
+        if password_hash is None:
+            self._run(check_password_hash, self._get_dummy_hash(), password)
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Werkzeug spells out default parameters in the stored hash ('pbkdf2' -> 'pbkdf2:sha256:600000')
+        return password_hash.split('$', 1)[0] != self._get_dummy_hash().split('$', 1)[0]
+
+    def _get_dummy_hash(self):
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash('', self.method)
+        return self._dummy_hash
+
+
+password_hasher = PasswordHasher()
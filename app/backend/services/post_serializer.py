@@ -0,0 +1,69 @@
+import json
+from flask import current_app
+from models.user import User
+from services.cache import MemoryBackend, MISSING
+from services.likes import like_totals, shard_count
+
+# Process-local cache of pre-encoded post JSON. Keys include the post's
+# version stamp, so entries never need invalidating; LRU keeps it bounded.
+RENDER_CACHE_SIZE = 5000
+RENDER_CACHE_TTL = 3600
+_fragments = MemoryBackend(max_entries=RENDER_CACHE_SIZE)
+
+
+def load_authors(posts):
+    """Return a {email: username} map for the authors of ``posts`` in one query."""
+    posts = list(posts)
+    emails = {post.user_email for post in posts}
+    if not emails:
+        return {}
+    rows = User.query.with_entities(User.email, User.username).filter(User.email.in_(emails)).all()
+    return {email: username for email, username in rows}
+
+
+def serialize_post(post, authors=None, likes=None):
+    """Serialize a post with its author info and comment count."""
+    if authors is None:
+        authors = load_authors([post])
+    if likes is None and shard_count():
+        likes = like_totals([post.id])
+    post_dict = post.to_dict()
+    if likes:
+        post_dict['likes'] = likes.get(post.id, post_dict['likes'])
+    post_dict['user'] = {
+        'name': authors.get(post.user_email, 'Unknown User'),
+        'email': post.user_email
+    }
+    post_dict['comments_count'] = 0
+    return post_dict
+
+
+def _fragment_key(post, likes):
+    return f'{post.id}:{post.version}:{likes.get(post.id, post.likes)}'
+
+
+def render_posts(posts):
+    """Return pre-encoded JSON for each post, serializing only cache misses.
+
+    The author lookup only runs when at least one post misses the cache.
+    """
+    posts = list(posts)
+    likes = like_totals(post.id for post in posts) if shard_count() else {}
+    keys = [_fragment_key(post, likes) for post in posts]
+    fragments = [_fragments.get(key) for key in keys]
+    missing = [i for i, fragment in enumerate(fragments) if fragment is MISSING]
+    if missing:
+        authors = load_authors(posts[i] for i in missing)
+        for i in missing:
+            fragments[i] = json.dumps(serialize_post(posts[i], authors, likes), separators=(',', ':'))
+            _fragments.set(keys[i], fragments[i], RENDER_CACHE_TTL)
+    return fragments
+
+
+def posts_response(fragments, **fields):
+    """Assemble a ``{"posts": [...], **fields}`` JSON response from rendered fragments."""
+    parts = ['{"posts":[', ','.join(fragments), ']']
+    for name, value in fields.items():
+        parts.append(',{}:{}'.format(json.dumps(name), json.dumps(value, separators=(',', ':'))))
+    parts.append('}')
+    return current_app.response_class(''.join(parts), mimetype='application/json')
@@ -0,0 +1,166 @@
+"""Shared, cost-weighted rate limiting for flask-limiter.
+
+Counters live in ``RATELIMIT_STORAGE_URI``, which every gunicorn worker
+shares, so a limit means the same thing whatever the worker count:
+
+- ``redis://...``: any Redis-compatible server (limits' own storage).
+- ``sqlite:///<path>``: ``SQLiteStorage`` below, one file shared by the
+  workers on a single host.
+- ``memory://``: per worker; only for tests.
+
+``RATELIMIT_STRATEGY`` defaults to the sliding-window counter: a weighted
+sum of the current and previous fixed windows. This avoids the burst at
+fixed-window boundaries, and each check costs two counters, not a log.
+
+Clients are keyed by JWT identity when the request carries a valid
+access token (so users behind one NAT get their own budgets), and by
+remote address otherwise. Each request costs ``request_cost()`` units of
+every limit: uploads and searches cost more than plain reads.
+"""
+import sqlite3
+import threading
+import time
+from math import floor
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_limiter.util import get_remote_address
+from jwt.exceptions import PyJWTError
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+UPLOAD_ENDPOINTS = {'posts.create_post', 'posts.create_post_no_slash', 'profile.upload_image'}
+PURGE_EVERY = 1000  # Writes between sweeps of expired counters
+
+
+def rate_limit_key():
+    """``user:<email>`` for requests with a valid access token, ``ip:<address>`` otherwise."""
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        try:
+            claims = decode_token(auth[len('Bearer '):])
+            return f"user:{claims[current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')]}"
+        except (JWTExtendedException, PyJWTError, KeyError):
+            pass
+    return f'ip:{get_remote_address()}'
+
+
+def request_cost():
+    """Units of every limit the current request consumes."""
+    # Content type, not request.files: limits are checked before the route's
+    # auth and limit_upload, so the body must not be parsed here
+    if request.endpoint in UPLOAD_ENDPOINTS and request.mimetype == 'multipart/form-data':
+        return current_app.config.get('RATELIMIT_UPLOAD_COST', 10)
+    if request.args.get('search', '').strip():
+        return current_app.config.get('RATELIMIT_SEARCH_COST', 3)
+    return 1
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """limits storage in one SQLite file, registered for ``sqlite:///<path>`` URIs.
+
+    Checking and taking a sliding-window entry happen in one ``BEGIN
+    IMMEDIATE`` transaction, so concurrent workers cannot overshoot a limit.
+    """
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.path = uri.split('sqlite:///', 1)[1]
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _get(self, conn, key, now):
+        row = conn.execute('SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, conn, key, expiry, amount, now):
+        conn.execute('DELETE FROM rate_limits WHERE key = ? AND expires_at <= ?', (key, now))
+        conn.execute(
+            'INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET count = count + excluded.count',
+            (key, amount, now + expiry)
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,))
+        return self._get(conn, key, now)
+
+    def incr(self, key, expiry, amount=1):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = self._incr(conn, key, expiry, amount, time.time())
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return count
+
+    def get(self, key):
+        return self._get(self._connect(), key, time.time())
+
+    def get_expiry(self, key):
+        row = self._connect().execute('SELECT expires_at FROM rate_limits WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._connect().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connect().execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        self._connect().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def _sliding_window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            acquired = floor(previous_count * previous_ttl / expiry + current_count) + amount <= limit
+            if acquired:
+                # The current window is read as the previous one for a whole window more
+                self._incr(conn, self.sliding_window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return acquired
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window(self._connect(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
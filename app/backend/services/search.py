@@ -0,0 +1,76 @@
+"""Full-text search over post title/content.
+
+SQLite uses an external-content FTS5 table kept in sync by triggers;
+PostgreSQL uses a GIN expression index over ``to_tsvector``. Both are
+created by the ``add_posts_fulltext_search`` migration. Any other backend,
+or an SQLite database without the FTS5 table, falls back to ILIKE matching.
+"""
+import re
+from sqlalchemy import text, table, column, literal_column, func, or_, desc
+from extensions import db
+from models.post import Post
+
+FTS_TABLE = 'posts_fts'
+TS_CONFIG = 'english'
+
+_POSTGRES_VECTOR = f"to_tsvector('{TS_CONFIG}', coalesce(posts.title, '') || ' ' || coalesce(posts.content, ''))"
+
+fts = table(FTS_TABLE, column('rowid'), column('rank'))
+
+# Backend chosen by init_search(): 'sqlite', 'postgresql' or None (ILIKE fallback)
+_backend = None
+
+
+def init_search(engine):
+    """Pick the search backend for the current database; the index itself comes from a migration."""
+    global _backend
+    dialect = engine.dialect.name
+    _backend = None
+    try:
+        if dialect == 'sqlite':
+            with engine.connect() as conn:
+                if conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ), {'name': FTS_TABLE}).first():
+                    _backend = dialect
+        elif dialect == 'postgresql':
+            _backend = dialect
+    except Exception as e:
+        print(f"Full-text search unavailable, falling back to ILIKE: {e}")
+
+
+def _fts5_query(search):
+    # Quote every token so user input can't inject FTS5 syntax; prefix-match each one
+    tokens = re.findall(r'\w+', search, re.UNICODE)
+    return ' '.join('"{}"*'.format(token) for token in tokens)
+
+
+def apply_search(query, search):
+    """Filter ``query`` to posts matching ``search``.
+
+    Returns ``(query, rank)`` where ``rank`` is an expression to order by
+    (higher is more relevant), or None when the fallback matcher is used.
+    """
+    if _backend == 'sqlite':
+        match = _fts5_query(search)
+        if not match:
+            return query.filter(db.false()), None
+        query = query.join(fts, fts.c.rowid == Post.id).filter(
+            literal_column(FTS_TABLE).op('MATCH')(match)
+        )
+        # FTS5 bm25 rank is lower-is-better
+        return query, -fts.c.rank
+    if _backend == 'postgresql':
+        vector = literal_column(_POSTGRES_VECTOR)
+        tsquery = func.plainto_tsquery(TS_CONFIG, search)
+        return query.filter(vector.op('@@')(tsquery)), func.ts_rank(vector, tsquery)
+    return query.filter(or_(
+        Post.title.ilike(f'%{search}%'),
+        Post.content.ilike(f'%{search}%')
+    )), None
+
+
+def order_by_relevance(query, rank):
+    if rank is None:
+        return query.order_by(desc(Post.created_at), desc(Post.id))
+    return query.order_by(desc(rank), desc(Post.created_at), desc(Post.id))
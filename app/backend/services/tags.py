@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, desc
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.post_tag import PostTag
+from models.tag_count import TagCount, TagDailyCount
+
+POPULAR_TAGS_LIMIT = 20
+
+# Named windows accepted by /api/posts/popular-tags?window=
+TAG_WINDOWS = {
+    'day': 1,
+    'week': 7,
+    'month': 30,
+}
+
+
+def _bump(model, delta, **key):
+    """Atomically add ``delta`` to a counter row, creating it if needed."""
+    table = model.__table__
+    condition = [table.c[name] == value for name, value in key.items()]
+    result = db.session.execute(
+        table.update().where(*condition).values(count=table.c.count + delta)
+    )
+    if result.rowcount or delta < 0:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(count=delta, **key))
+    except IntegrityError:
+        # Another transaction created the row first; increment it instead
+        db.session.execute(table.update().where(*condition).values(count=table.c.count + delta))
+
+
+def update_tag_counts(tags, created_at, delta):
+    """Adjust counters for a post's tags in the caller's transaction.
+
+    ``delta`` is +1 when a post is created and -1 when it is deleted.
+    """
+    day = (created_at or datetime.utcnow()).date()
+    for tag in PostTag.parse(tags):
+        _bump(TagCount, delta, tag=tag)
+        _bump(TagDailyCount, delta, tag=tag, day=day)
+
+
+def popular_tags(window=None, limit=POPULAR_TAGS_LIMIT):
+    """Most used tags, all-time or over the last ``window`` days."""
+    if not window:
+        rows = db.session.query(TagCount.tag).filter(TagCount.count > 0).order_by(
+            desc(TagCount.count), TagCount.tag
+        ).limit(limit).all()
+        return [tag for tag, in rows]
+    since = datetime.utcnow().date() - timedelta(days=window - 1)
+    total = func.sum(TagDailyCount.count)
+    rows = db.session.query(TagDailyCount.tag).filter(TagDailyCount.day >= since).group_by(
+        TagDailyCount.tag
+    ).having(total > 0).order_by(desc(total), TagDailyCount.tag).limit(limit).all()
+    return [tag for tag, in rows]
@@ -0,0 +1,199 @@
+"""Materialized home timelines (fan-out-on-write).
+
+When a post is created its id is pushed into the bounded timeline of the
+author and of every follower, so reading a home timeline is one range
+lookup. Authors with more than ``TIMELINE_FANOUT_MAX_FOLLOWERS`` followers
+are not fanned out. Their recent posts are merged in at read time instead
+(fan-out-on-read), so one post never turns into millions of writes.
+
+Timelines live in the ``timeline_entries`` table by default. With
+``TIMELINE_BACKEND=redis`` they are capped Redis sorted sets at
+``TIMELINE_REDIS_URL``.
+"""
+import random
+from flask import current_app
+from sqlalchemy import delete, select, literal, func, desc, tuple_
+from extensions import db
+from models.follow import Follow
+from models.post import Post
+from models.timeline import TimelineEntry
+
+# Chance that a push also trims the author's followers' timelines back to size
+TRIM_PROBABILITY = 0.1
+
+
+class SQLTimelineStore:
+    def push(self, post, max_entries):
+        # One INSERT ... SELECT fans the post out to every follower
+        followers = select(
+            Follow.follower_email, literal(post.id), literal(post.user_email)
+        ).where(Follow.followee_email == post.user_email)
+        table = TimelineEntry.__table__
+        db.session.execute(table.insert().from_select(['user_email', 'post_id', 'author_email'], followers))
+        db.session.execute(table.insert().values(user_email=post.user_email, post_id=post.id, author_email=post.user_email))
+        if random.random() < TRIM_PROBABILITY:
+            self.trim(post.user_email, max_entries)
+
+    def trim(self, author_email, max_entries):
+        """Cap the timelines of ``author_email`` and their followers at ``max_entries``."""
+        # One DELETE whatever the follower count: rank each timeline's entries
+        # newest first and drop everything past the cap
+        followers = select(Follow.follower_email).where(Follow.followee_email == author_email)
+        rank = func.row_number().over(
+            partition_by=TimelineEntry.user_email, order_by=desc(TimelineEntry.post_id)
+        ).label('rank')
+        ranked = select(TimelineEntry.user_email, TimelineEntry.post_id, rank).where(
+            (TimelineEntry.user_email == author_email) | TimelineEntry.user_email.in_(followers)
+        ).subquery()
+        overflow = select(ranked.c.user_email, ranked.c.post_id).where(ranked.c.rank > max_entries)
+        db.session.execute(
+            delete(TimelineEntry).where(tuple_(TimelineEntry.user_email, TimelineEntry.post_id).in_(overflow)),
+            execution_options={'synchronize_session': False}
+        )
+
+    def range(self, user_email, before_id, limit):
+        query = db.session.query(TimelineEntry.post_id).filter(TimelineEntry.user_email == user_email)
+        if before_id:
+            query = query.filter(TimelineEntry.post_id < before_id)
+        return [post_id for post_id, in query.order_by(desc(TimelineEntry.post_id)).limit(limit)]
+
+    def add_author(self, user_email, author_email, post_ids):
+        if post_ids:
+            db.session.execute(TimelineEntry.__table__.insert(), [
+                {'user_email': user_email, 'post_id': post_id, 'author_email': author_email} for post_id in post_ids
+            ])
+
+    def remove_author(self, user_email, author_email):
+        TimelineEntry.query.filter_by(user_email=user_email, author_email=author_email).delete(synchronize_session=False)
+
+    def remove_post(self, post):
+        TimelineEntry.query.filter_by(post_id=post.id).delete(synchronize_session=False)
+
+
+class RedisTimelineStore:
+    def __init__(self, url, prefix='prok:timeline:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("TIMELINE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, user_email):
+        return self.prefix + user_email
+
+    def push(self, post, max_entries):
+        users = [post.user_email] + [
+            email for email, in db.session.query(Follow.follower_email).filter_by(followee_email=post.user_email)
+        ]
+        # Sorted sets scored by post id keep each timeline ordered and capped
+        pipe = self.client.pipeline(transaction=False)
+        for user_email in users:
+            pipe.zadd(self._key(user_email), {f'{post.id}:{post.user_email}': post.id})
+            pipe.zremrangebyrank(self._key(user_email), 0, -max_entries - 1)
+        pipe.execute()
+
+    def range(self, user_email, before_id, limit):
+        high = f'({before_id}' if before_id else '+inf'
+        members = self.client.zrevrangebyscore(self._key(user_email), high, '-inf', start=0, num=limit)
+        return [int(member.split(b':', 1)[0]) for member in members]
+
+    def add_author(self, user_email, author_email, post_ids):
+        if post_ids:
+            self.client.zadd(self._key(user_email), {f'{post_id}:{author_email}': post_id for post_id in post_ids})
+
+    def remove_author(self, user_email, author_email):
+        key = self._key(user_email)
+        suffix = f':{author_email}'.encode()
+        stale = [member for member in self.client.zrange(key, 0, -1) if member.endswith(suffix)]
+        if stale:
+            self.client.zrem(key, *stale)
+
+    def remove_post(self, post):
+        users = [post.user_email] + [
+            email for email, in db.session.query(Follow.follower_email).filter_by(followee_email=post.user_email)
+        ]
+        for user_email in users:
+            self.client.zrem(self._key(user_email), f'{post.id}:{post.user_email}')
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if current_app.config.get('TIMELINE_BACKEND', 'sql') == 'redis':
+            _store = RedisTimelineStore(current_app.config['TIMELINE_REDIS_URL'])
+        else:
+            _store = SQLTimelineStore()
+    return _store
+
+
+def max_entries():
+    return current_app.config.get('TIMELINE_MAX_ENTRIES', 800)
+
+
+def fanout_limit():
+    return current_app.config.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def follower_count(email):
+    return db.session.query(func.count()).select_from(Follow).filter(Follow.followee_email == email).scalar()
+
+
+def fan_out_post(post):
+    """Push a new post into timelines, unless its author is too widely followed."""
+    if not post.is_public:
+        get_store().add_author(post.user_email, post.user_email, [post.id])
+        return
+    if follower_count(post.user_email) > fanout_limit():
+        # Followers pick this up at read time; the author still sees it
+        get_store().add_author(post.user_email, post.user_email, [post.id])
+        return
+    get_store().push(post, max_entries())
+
+
+def remove_post(post):
+    get_store().remove_post(post)
+
+
+def follow(follower_email, followee_email):
+    """Follow an author and backfill their recent public posts into the timeline."""
+    db.session.add(Follow(follower_email=follower_email, followee_email=followee_email))
+    if follower_count(followee_email) <= fanout_limit():
+        recent = db.session.query(Post.id).filter(
+            Post.user_email == followee_email, Post.is_public == True
+        ).order_by(desc(Post.id)).limit(max_entries()).all()
+        get_store().add_author(follower_email, followee_email, [post_id for post_id, in recent])
+    db.session.commit()
+
+
+def unfollow(follower_email, followee_email):
+    Follow.query.filter_by(follower_email=follower_email, followee_email=followee_email).delete(synchronize_session=False)
+    get_store().remove_author(follower_email, followee_email)
+    db.session.commit()
+
+
+def _fan_out_on_read_authors(user_email):
+    """Followed authors whose posts were not fanned out on write."""
+    followees = select(Follow.followee_email).where(Follow.follower_email == user_email)
+    rows = db.session.query(Follow.followee_email).filter(
+        Follow.followee_email.in_(followees)
+    ).group_by(Follow.followee_email).having(func.count() > fanout_limit()).all()
+    return [email for email, in rows]
+
+
+def home_timeline(user_email, before_id=None, limit=20):
+    """Return ``(post ids newest first, next cursor)`` for a user's home timeline."""
+    post_ids = get_store().range(user_email, before_id, limit + 1)
+    authors = _fan_out_on_read_authors(user_email)
+    if authors:
+        query = db.session.query(Post.id).filter(Post.user_email.in_(authors), Post.is_public == True)
+        if before_id:
+            query = query.filter(Post.id < before_id)
+        post_ids = sorted(set(post_ids) | {post_id for post_id, in query.order_by(desc(Post.id)).limit(limit + 1)},
+                          reverse=True)
+    page = post_ids[:limit]
+    next_cursor = page[-1] if len(post_ids) > limit else None
+    return page, next_cursor
@@ -0,0 +1,86 @@
+"""Trending ranking with time decay.
+
+The score is ``log10(engagement) + age_bonus``. Engagement is weighted
+likes plus views, and a post's age bonus grows linearly with its creation
+time, so every ``TRENDING_DECAY_SECONDS`` of recency is worth 10x the
+engagement. The score of a post with no new activity never changes, so
+recomputing only touches posts marked dirty by a like or a view flush.
+"""
+import math
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from extensions import db, cache
+from models.post import Post
+from models.post_score import PostScore
+
+LIKE_WEIGHT = 5
+VIEW_WEIGHT = 1
+EPOCH = datetime(2025, 1, 1)
+
+# Max dirty posts rescored per recompute run
+RECOMPUTE_BATCH = 1000
+
+
+def hot_score(likes, views, created_at):
+    engagement = max((likes or 0) * LIKE_WEIGHT + (views or 0) * VIEW_WEIGHT, 1)
+    decay = current_app.config.get('TRENDING_DECAY_SECONDS', 45000)
+    age_bonus = ((created_at or datetime.utcnow()) - EPOCH).total_seconds() / decay
+    return round(math.log10(engagement) + age_bonus, 7)
+
+
+def score_new_post(post):
+    """Give a freshly created post its score in the create transaction."""
+    db.session.add(PostScore(
+        post_id=post.id, score=hot_score(post.likes, post.views, post.created_at), dirty=False
+    ))
+
+
+def mark_dirty(post_ids, conn=None):
+    """Flag posts with new activity so the next recompute rescores them."""
+    post_ids = list(post_ids)
+    if post_ids:
+        stmt = PostScore.__table__.update().where(PostScore.__table__.c.post_id.in_(post_ids)).values(dirty=True)
+        (conn or db.session).execute(stmt)
+
+
+def delete_score(post_id):
+    PostScore.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+
+
+def recompute(limit=RECOMPUTE_BATCH):
+    """Rescore dirty posts (and any post missing a score row); returns the number rescored."""
+    table = PostScore.__table__
+    missing = select(Post.id).where(~Post.id.in_(select(table.c.post_id)))
+    db.session.execute(table.insert().from_select(['post_id'], missing))
+
+    rows = db.session.query(Post.id, Post.likes, Post.views, Post.created_at).join(
+        PostScore, PostScore.post_id == Post.id
+    ).filter(PostScore.dirty == True).limit(limit).all()
+    now = datetime.utcnow()
+    if rows:
+        db.session.execute(
+            table.update().where(table.c.post_id == db.bindparam('pid')).values(
+                score=db.bindparam('new_score'), dirty=False, computed_at=now
+            ),
+            [{'pid': post_id, 'new_score': hot_score(likes, views, created_at)}
+             for post_id, likes, views, created_at in rows]
+        )
+    db.session.commit()
+    return len(rows)
+
+
+def refresh_if_stale():
+    """Run an incremental recompute at most once per TRENDING_REFRESH_SECONDS across workers."""
+    interval = current_app.config.get('TRENDING_REFRESH_SECONDS', 60)
+    if cache.get('trending', 'last_recompute') is None:
+        cache.set('trending', 'last_recompute', datetime.utcnow().isoformat(), interval)
+        recompute()
+
+
+def order_by_trending(query):
+    # Inner join so the planner can walk the score index; every post gets
+    # a score row on create or at the next recompute
+    return query.join(PostScore, PostScore.post_id == Post.id).order_by(
+        PostScore.score.desc(), PostScore.post_id.desc()
+    )
@@ -0,0 +1,122 @@
+"""Early rejection of oversized or mistyped multipart uploads.
+
+``limit_upload`` gives a route its own body limit and enforces it before
+the upload is buffered:
+
+- a ``Content-Length`` above the limit is rejected with 413 before any of
+  the body is read;
+- ``UploadRequest`` applies the limit as the request's
+  ``max_content_length``, so Werkzeug stops reading chunked bodies past it;
+- each file part is streamed into an ``UploadSpool`` that aborts once the
+  per-file limit is crossed, and sniffs the file type from its first bytes
+  instead of trusting the extension. It also hashes the content on the way
+  through.
+
+The sniffed extension and SHA-256 are available to the view as
+``file.stream.sniffed`` and ``file.stream.digest``. Apply it below
+``@jwt_required()``, so anonymous bodies are refused before any is read.
+"""
+import hashlib
+from functools import wraps
+from tempfile import SpooledTemporaryFile
+from flask import Request, current_app, jsonify, request
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge, UnsupportedMediaType
+
+# Room for the non-file form fields and multipart framing
+FORM_OVERHEAD = 64 * 1024
+SPOOL_MEMORY_SIZE = 500 * 1024  # Larger files spill to disk, as with Werkzeug's default
+SNIFF_BYTES = 12
+# ISO base media major brands that are MP4 video. HEIC/AVIF images, 3GP,
+# QuickTime and M4A audio share the 'ftyp' box but not these brands
+MP4_BRANDS = {b'isom', b'iso2', b'iso3', b'iso4', b'iso5', b'iso6', b'mp41', b'mp42', b'avc1', b'dash', b'M4V '}
+ENVIRON_KEY = 'prok.upload_limit'
+
+
+def sniff(head):
+    """Return the extension matching the file's magic bytes, or None."""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'GIF87a') or head.startswith(b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[4:8] == b'ftyp' and head[8:12] in MP4_BRANDS:
+        return 'mp4'
+    if head.startswith(b'\x1aE\xdf\xa3'):
+        return 'webm'
+    return None
+
+
+class UploadSpool(SpooledTemporaryFile):
+    """Temporary file for one upload part that enforces a size cap, sniffs its type and hashes it."""
+
+    def __init__(self, max_bytes, allowed):
+        super().__init__(max_size=SPOOL_MEMORY_SIZE, mode='rb+')
+        self.max_bytes = max_bytes
+        self.allowed = allowed
+        self.received = 0
+        self.head = b''
+        self.sniffed = None
+        self._sha256 = hashlib.sha256()
+
+    @property
+    def digest(self):
+        return self._sha256.hexdigest()
+
+    def write(self, data):
+        self.received += len(data)
+        if self.received > self.max_bytes:
+            raise RequestEntityTooLarge('File too large')
+        if self.sniffed is None and len(self.head) < SNIFF_BYTES:
+            self.head += bytes(data[:SNIFF_BYTES - len(self.head)])
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        self._sha256.update(data)
+        return super().write(data)
+
+    def check_type(self):
+        self.sniffed = sniff(self.head)
+        if self.sniffed not in self.allowed:
+            raise UnsupportedMediaType('Invalid file type')
+
+
+class UploadRequest(Request):
+    """Request whose body limit and file streams follow the route's ``limit_upload``."""
+
+    @property
+    def max_content_length(self):
+        limit = self.environ.get(ENVIRON_KEY)
+        if limit:
+            return limit[0] + FORM_OVERHEAD
+        return current_app.config['MAX_CONTENT_LENGTH'] if current_app else None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        limit = self.environ.get(ENVIRON_KEY)
+        if limit and filename:
+            return UploadSpool(*limit)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def limit_upload(max_bytes, allowed):
+    """Reject bodies over ``max_bytes`` (plus form overhead) and files whose sniffed type is not ``allowed``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method == 'OPTIONS':
+                return view(*args, **kwargs)
+            if request.content_length is not None and request.content_length > max_bytes + FORM_OVERHEAD:
+                return jsonify({'msg': 'File too large'}), 413
+            request.environ[ENVIRON_KEY] = (max_bytes, allowed)
+            try:
+                # Parse now, so the limits apply while the body streams in
+                files = request.files
+                for file in files.values():
+                    if file.filename and isinstance(file.stream, UploadSpool) and file.stream.sniffed is None:
+                        file.stream.check_type()
+            except HTTPException as e:
+                return jsonify({'msg': 'File too large' if e.code == 413 else e.description}), e.code
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+"""Write-behind buffer for post view counts.
+
+Views are accumulated per worker and flushed as ``views = views + n``
+batches, either every ``VIEW_FLUSH_INTERVAL`` seconds or once
+``VIEW_FLUSH_THRESHOLD`` views are pending, whichever comes first. Those
+two settings bound how many views a crashed worker can lose. Pending
+views are also flushed when the worker exits.
+"""
+import atexit
+import os
+import threading
+from sqlalchemy import update, bindparam
+from extensions import db
+from models.post import Post
+from services.trending import mark_dirty
+
+
+class ViewCounter:
+    def __init__(self):
+        self.app = None
+        self.interval = 5
+        self.threshold = 500
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', 5)
+        self.threshold = app.config.get('VIEW_FLUSH_THRESHOLD', 500)
+        app.extensions['view_counter'] = self
+        atexit.register(self.flush)
+
+    def record(self, post_id, count=1):
+        """Buffer ``count`` views of ``post_id``; flushes inline once the threshold is hit."""
+        self._ensure_timer()
+        with self._lock:
+            self._pending[post_id] = self._pending.get(post_id, 0) + count
+            self._pending_total += count
+            full = self._pending_total >= self.threshold
+        if full:
+            self.flush()
+
+    def pending(self, post_id):
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Write all buffered views in one batched UPDATE."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._pending_total = self._pending, {}, 0
+            if not batch or self.app is None:
+                return
+            params = [{'post_id': post_id, 'n': n} for post_id, n in batch.items()]
+            stmt = update(Post.__table__).where(
+                Post.__table__.c.id == bindparam('post_id')
+            ).values(
+                views=db.func.coalesce(Post.__table__.c.views, 0) + bindparam('n'),
+                version=Post.__table__.c.version + 1
+            )
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(stmt, params)
+                        mark_dirty(batch.keys(), conn)
+            except Exception as e:
+                print(f"View count flush failed: {e}")
+                # Put the views back so the next flush retries them
+                with self._lock:
+                    for post_id, n in batch.items():
+                        self._pending[post_id] = self._pending.get(post_id, 0) + n
+                        self._pending_total += n
+
+    def _ensure_timer(self):
+        # Started lazily so each forked gunicorn worker gets its own flusher
+        pid = os.getpid()
+        if self._timer_pid == pid:
+            return
+        self._timer_pid = pid
+        self._schedule()
+
+    def _schedule(self):
+        timer = threading.Timer(self.interval, self._tick)
+        timer.daemon = True
+        timer.start()
+
+    def _tick(self):
+        self.flush()
+        self._schedule()
+
+
+view_counter = ViewCounter()
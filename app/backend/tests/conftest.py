@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py builds an app at import time, so the environment must be set first
+_tmp = tempfile.mkdtemp(prefix='prok-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'test.db')
+os.environ['MEDIA_STORAGE'] = 'local'
+os.environ['MEDIA_LOCAL_ROOT'] = os.path.join(_tmp, 'media')
+os.environ['MEDIA_SPOOL_DIR'] = _tmp
+os.environ['JWT_SECRET_KEY'] = 'test-jwt-secret-at-least-32-bytes-long'
+os.environ['MEDIA_SIGNING_SECRET'] = 'test-signing-secret'
+os.environ['MEDIA_UPLOAD_WORKERS'] = '0'
+os.environ['MEDIA_VARIANT_WORKERS'] = '0'
+os.environ['MEDIA_REAP_INTERVAL'] = '0'
+os.environ['RATELIMIT_STORAGE_URI'] = 'memory://'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from extensions import db, limiter  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    limiter.enabled = False
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    credentials = {'email': 'tester@example.com', 'password': 'passw0rd1'}
+    client.post('/api/auth/signup', json={**credentials, 'username': 'tester'})
+    token = client.post('/api/auth/login', json=credentials).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,38 @@
+import io
+
+from PIL import Image
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def test_truncated_post_image_is_rejected(client, auth_headers):
+    data = {'title': 'Hello', 'content': 'World', 'media': (io.BytesIO(png_bytes()[:60]), 'broken.png')}
+    response = client.post('/api/posts/', headers=auth_headers, data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert response.get_json()['msg'] == 'Invalid image'
+
+
+def test_corrupt_avatar_is_rejected(client, auth_headers):
+    corrupt = png_bytes()
+    corrupt = corrupt[:40] + b'\x00' * 16 + corrupt[56:]
+    data = {'image': (io.BytesIO(corrupt), 'avatar.png')}
+    response = client.post('/api/profile/image', headers=auth_headers, data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert response.get_json()['msg'] == 'Invalid image'
+
+
+def test_valid_post_image_is_accepted(client, auth_headers):
+    data = {'title': 'Hello', 'content': 'World', 'media': (io.BytesIO(png_bytes()), 'ok.png')}
+    response = client.post('/api/posts/', headers=auth_headers, data=data, content_type='multipart/form-data')
+    assert response.status_code in (201, 202)
+
+
+def test_non_mp4_ftyp_upload_is_rejected(client, auth_headers):
+    heic = b'\x00\x00\x00\x18ftypheic' + b'\x00' * 64
+    data = {'title': 'Hello', 'content': 'World', 'media': (io.BytesIO(heic), 'clip.mp4')}
+    response = client.post('/api/posts/', headers=auth_headers, data=data, content_type='multipart/form-data')
+    assert response.status_code == 415
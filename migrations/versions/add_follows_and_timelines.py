@@ -0,0 +1,44 @@
+"""Add follows and timeline_entries for materialized home timelines
+
+Revision ID: add_follows_and_timelines
+Revises: add_version_to_posts
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_follows_and_timelines'
+down_revision = 'add_version_to_posts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('follows',
+    sa.Column('follower_email', sa.String(length=120), nullable=False),
+    sa.Column('followee_email', sa.String(length=120), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['followee_email'], ['users.email'], ),
+    sa.ForeignKeyConstraint(['follower_email'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('follower_email', 'followee_email')
+    )
+    op.create_index('ix_follows_followee_email', 'follows', ['followee_email'], unique=False)
+    op.create_table('timeline_entries',
+    sa.Column('user_email', sa.String(length=120), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_email', sa.String(length=120), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_email'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('user_email', 'post_id')
+    )
+    op.create_index('ix_timeline_entries_post_id', 'timeline_entries', ['post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_timeline_entries_post_id', table_name='timeline_entries')
+    op.drop_table('timeline_entries')
+    op.drop_index('ix_follows_followee_email', table_name='follows')
+    op.drop_table('follows')
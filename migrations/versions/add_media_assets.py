@@ -0,0 +1,42 @@
+"""Add media_assets for the content-addressed media store
+
+Revision ID: add_media_assets
+Revises: add_media_variants
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_assets'
+down_revision = 'add_media_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('resource_type', sa.String(length=20), nullable=False),
+    sa.Column('ext', sa.String(length=10), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=False),
+    sa.Column('variants', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('refcount', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('digest', 'kind', name='uq_media_assets_digest_kind'),
+    sa.UniqueConstraint('public_id')
+    )
+    op.create_index(op.f('ix_media_assets_url'), 'media_assets', ['url'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_media_assets_url'), table_name='media_assets')
+    op.drop_table('media_assets')
@@ -0,0 +1,34 @@
+"""Add media_deletions, the media reaper's queue of stored files to delete
+
+Revision ID: add_media_deletions
+Revises: add_media_assets
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_deletions'
+down_revision = 'add_media_assets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_deletions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('resource_type', sa.String(length=20), nullable=False),
+    sa.Column('queued_at', sa.DateTime(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_deletions_queued_at'), 'media_deletions', ['queued_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_media_deletions_queued_at'), table_name='media_deletions')
+    op.drop_table('media_deletions')
@@ -0,0 +1,45 @@
+"""Add media_jobs and posts.media_status for background media uploads
+
+Revision ID: add_media_jobs
+Revises: add_posts_composite_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_jobs'
+down_revision = 'add_posts_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('owner_email', sa.String(length=120), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('resource_type', sa.String(length=20), nullable=False),
+    sa.Column('ext', sa.String(length=10), nullable=False),
+    sa.Column('spool_path', sa.String(length=500), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_email'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_media_jobs_owner_email'), 'media_jobs', ['owner_email'], unique=False)
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('media_status', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('media_status')
+    op.drop_index(op.f('ix_media_jobs_owner_email'), table_name='media_jobs')
+    op.drop_table('media_jobs')
@@ -0,0 +1,30 @@
+"""Add posts.media_variants and profiles.avatar_variants for resized image variants
+
+Revision ID: add_media_variants
+Revises: add_media_jobs
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_media_variants'
+down_revision = 'add_media_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('media_variants', sa.Text(), nullable=True))
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('avatar_variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.drop_column('avatar_variants')
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('media_variants')
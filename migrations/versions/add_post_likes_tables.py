@@ -0,0 +1,39 @@
+"""Add post_likes ledger and post_like_shards counters
+
+Revision ID: add_post_likes_tables
+Revises: add_tag_counts_tables
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_post_likes_tables'
+down_revision = 'add_tag_counts_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_likes',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('user_email', sa.String(length=120), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_email'], ['users.email'], ),
+    sa.PrimaryKeyConstraint('post_id', 'user_email')
+    )
+    op.create_table('post_like_shards',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'shard')
+    )
+
+
+def downgrade():
+    op.drop_table('post_like_shards')
+    op.drop_table('post_likes')
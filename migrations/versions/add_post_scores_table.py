@@ -0,0 +1,37 @@
+"""Add post_scores for the precomputed trending ranking
+
+Revision ID: add_post_scores_table
+Revises: add_follows_and_timelines
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_post_scores_table'
+down_revision = 'add_follows_and_timelines'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_scores',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('dirty', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    op.create_index(op.f('ix_post_scores_score'), 'post_scores', ['score'], unique=False)
+    op.create_index(op.f('ix_post_scores_dirty'), 'post_scores', ['dirty'], unique=False)
+    # Every existing post starts dirty and is scored by the first recompute
+    op.execute("INSERT INTO post_scores (post_id) SELECT id FROM posts")
+
+
+def downgrade():
+    op.drop_index(op.f('ix_post_scores_dirty'), table_name='post_scores')
+    op.drop_index(op.f('ix_post_scores_score'), table_name='post_scores')
+    op.drop_table('post_scores')
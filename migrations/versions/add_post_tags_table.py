@@ -0,0 +1,45 @@
+"""Add normalized post_tags table and backfill it from posts.tags
+
+Revision ID: add_post_tags_table
+Revises: add_category_tags_likes_views_to_posts
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_post_tags_table'
+down_revision = 'add_category_tags_likes_views_to_posts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    post_tags = op.create_table('post_tags',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'tag')
+    )
+    op.create_index('ix_post_tags_tag_post_id', 'post_tags', ['tag', 'post_id'], unique=False)
+
+    # Backfill from the comma-separated posts.tags column
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, tags FROM posts WHERE tags IS NOT NULL AND tags != ''"))
+    links = []
+    for post_id, tags in rows:
+        seen = set()
+        for tag in tags.split(','):
+            tag = tag.strip().lower()[:100]
+            if tag and tag not in seen:
+                seen.add(tag)
+                links.append({'post_id': post_id, 'tag': tag})
+    if links:
+        op.bulk_insert(post_tags, links)
+
+
+def downgrade():
+    op.drop_index('ix_post_tags_tag_post_id', table_name='post_tags')
+    op.drop_table('post_tags')
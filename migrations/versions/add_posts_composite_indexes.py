@@ -0,0 +1,36 @@
+"""Add composite indexes for every posts filter/sort combination
+
+Revision ID: add_posts_composite_indexes
+Revises: add_post_scores_table
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_posts_composite_indexes'
+down_revision = 'add_post_scores_table'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_posts_created_at_id', ['created_at', 'id']),
+    ('ix_posts_likes_id', ['likes', 'id']),
+    ('ix_posts_views_id', ['views', 'id']),
+    ('ix_posts_public_created_at_id', ['is_public', 'created_at', 'id']),
+    ('ix_posts_public_likes_id', ['is_public', 'likes', 'id']),
+    ('ix_posts_public_views_id', ['is_public', 'views', 'id']),
+    ('ix_posts_category_created_at_id', ['category', 'created_at', 'id']),
+    ('ix_posts_user_email_id', ['user_email', 'id']),
+]
+
+
+def upgrade():
+    for name, columns in INDEXES:
+        op.create_index(name, 'posts', columns, unique=False)
+
+
+def downgrade():
+    for name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name='posts')
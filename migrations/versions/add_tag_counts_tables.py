@@ -0,0 +1,49 @@
+"""Add tag_counts and tag_daily_counts and backfill them from post_tags
+
+Revision ID: add_tag_counts_tables
+Revises: add_post_tags_table
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tag_counts_tables'
+down_revision = 'add_post_tags_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_counts',
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tag')
+    )
+    op.create_index(op.f('ix_tag_counts_count'), 'tag_counts', ['count'], unique=False)
+    op.create_table('tag_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tag', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'tag')
+    )
+
+    op.execute(
+        "INSERT INTO tag_counts (tag, count) "
+        "SELECT tag, COUNT(*) FROM post_tags GROUP BY tag"
+    )
+    op.execute(
+        "INSERT INTO tag_daily_counts (day, tag, count) "
+        "SELECT DATE(posts.created_at), post_tags.tag, COUNT(*) FROM post_tags "
+        "JOIN posts ON posts.id = post_tags.post_id "
+        "WHERE posts.created_at IS NOT NULL "
+        "GROUP BY DATE(posts.created_at), post_tags.tag"
+    )
+
+
+def downgrade():
+    op.drop_table('tag_daily_counts')
+    op.drop_index(op.f('ix_tag_counts_count'), table_name='tag_counts')
+    op.drop_table('tag_counts')
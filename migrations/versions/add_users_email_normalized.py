@@ -0,0 +1,32 @@
+"""Add users.email_normalized, a unique lowercase email for indexed login lookups
+
+Revision ID: add_users_email_normalized
+Revises: add_media_deletions
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_email_normalized'
+down_revision = 'add_media_deletions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_normalized', sa.String(length=120), nullable=True))
+    op.execute("UPDATE users SET email_normalized = LOWER(TRIM(email))")
+    # Fails if two existing accounts differ only in case; merge them before upgrading
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('email_normalized', existing_type=sa.String(length=120), nullable=False)
+        batch_op.create_index(batch_op.f('ix_users_email_normalized'), ['email_normalized'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email_normalized'))
+        batch_op.drop_column('email_normalized')
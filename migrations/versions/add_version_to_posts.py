@@ -0,0 +1,24 @@
+"""Add version stamp to posts for the rendered-post cache
+
+Revision ID: add_version_to_posts
+Revises: add_post_likes_tables
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_version_to_posts'
+down_revision = 'add_post_likes_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('posts', 'version')
@@ -0,0 +1,32 @@
+"""Backfill NULL posts.likes/views with 0 and make both columns NOT NULL
+
+Revision ID: backfill_posts_likes_views
+Revises: add_posts_fulltext_search
+Create Date: 2026-10-18 23:00:00.000000
+
+Rows from before add_category_tags_likes_views_to_posts have NULL counts,
+which keyset pagination on likes/views can neither compare nor resume from.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'backfill_posts_likes_views'
+down_revision = 'add_posts_fulltext_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE posts SET likes = 0 WHERE likes IS NULL")
+    op.execute("UPDATE posts SET views = 0 WHERE views IS NULL")
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.alter_column('likes', existing_type=sa.Integer(), nullable=False, server_default='0')
+        batch_op.alter_column('views', existing_type=sa.Integer(), nullable=False, server_default='0')
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.alter_column('views', existing_type=sa.Integer(), nullable=True, server_default=None)
+        batch_op.alter_column('likes', existing_type=sa.Integer(), nullable=True, server_default=None)